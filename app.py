@@ -1,19 +1,22 @@
+import logging
+
 import streamlit as st
-import pandas as pd
-import altair as alt
-from streamlit_folium import st_folium
 
 from config import (
     PAGE_TITLE, PAGE_LAYOUT,
     PATH_UNI_BONN, PATH_EO_AFRICA, PATH_DETECT, PATH_TRA,
     PATH_IGG, PATH_UPDILIMAN, PATH_NIC_CAMERON,
     HEADER_LOGO_WIDTH, FOOTER_LOGO_WIDTH,
-    MAP_HEIGHT_PX
+    MAP_HEIGHT_PX, MAP_INIT_ZOOM, MAP_FOCUS_ZOOM,
+    DATA_CHART, CACHE_CATALOG_TTL_S
 )
 from utils import safe_b64
-from parsing import discover_stations, get_series_for
-from webdav_client import list_remote_txts, remote_snapshot_hash
-from ui_map import build_map
+from cache import cached, cache_stats
+
+log = logging.getLogger(__name__)
+
+# Heavy libraries (pandas, altair, folium, matplotlib, ...) are imported inside
+# the tab that first needs them, so text-only tabs and cold start stay light.
 
 
 # =========================
@@ -180,20 +183,32 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 
 # =========================
-# DATA LOAD (Remote WebDAV, cached)
+# DATA LOAD (storage backend, cached)
 # =========================
-@st.cache_data(show_spinner=True)
+@cached("stations", max_bytes=64 << 20, max_entries=1, ttl=CACHE_CATALOG_TTL_S)
 def load_stations():
-    remote_items = list_remote_txts()
-    snapshot = remote_snapshot_hash(remote_items)
-    stations_dict = discover_stations(snapshot)
-    return stations_dict
-
-stations = load_stations()
-
-if not stations:
-    st.warning("No station .txt files found in the remote folder.")
-    st.stop()
+    from parsing import discover_stations
+    from spatial import StationIndex
+    from storage import get_backend
+
+    backend = get_backend()
+    snapshot = backend.snapshot_hash(backend.list())
+    stations_dict, issues, notes = discover_stations(snapshot)
+    for msg in notes:
+        log.warning("format check: %s", msg)
+    # storage problems (e.g. mirror downloads) change without changing the snapshot
+    return stations_dict, StationIndex(stations_dict), backend.issues() + issues, notes
+
+def require_stations():
+    """Catalog for the tabs that show data; stops the page if it is empty."""
+    with st.spinner("Loading stations..."):
+        stations, station_index, issues, _ = load_stations()
+    for msg in issues:
+        st.warning(msg)
+    if not stations:
+        st.warning("No station .txt files found in the storage folder.")
+        st.stop()
+    return stations, station_index
 
 
 # Decide map height: medium (max 600)
@@ -208,117 +223,171 @@ except Exception:
 # =========================
 
 #--------------------Home--------------------------
+def _deep_link_view(station_index):
+    """(center, zoom) from ?station=, ?lat=&lon= (nearest station) or ?bbox=s,w,n,e."""
+    from spatial import zoom_for_bbox
+
+    qp = st.query_params
+    try:
+        if qp.get("station") in station_index.coords:
+            return station_index.coords[qp["station"]], MAP_FOCUS_ZOOM
+        if "lat" in qp and "lon" in qp:
+            hit = station_index.nearest(float(qp["lat"]), float(qp["lon"]))
+            if hit:
+                return station_index.coords[hit[0][0]], MAP_FOCUS_ZOOM
+        if "bbox" in qp:
+            south, west, north, east = (float(v) for v in qp["bbox"].split(","))
+            center = ((south + north) / 2, (west + east) / 2 if west <= east else (west + east + 360) / 2)
+            return center, zoom_for_bbox(south, west, north, east)
+    except ValueError:
+        pass
+    return None, None
+
 if st.session_state.active_tab == "Home":
+    import folium
+    from streamlit_folium import st_folium
+    from ui_map import build_map, build_marker_layer
+
+    stations, station_index = require_stations()
+
+    # Last viewport reported by the map component (absent on first render)
+    view = st.session_state.get("station_map") or {}
+    center, zoom = _deep_link_view(station_index)
+    bounds = view.get("bounds") if view else None
+    if center is not None and not bounds:
+        delta = 180.0 / 2 ** zoom
+        bounds = {
+            "_southWest": {"lat": center[0] - delta, "lng": center[1] - 2 * delta},
+            "_northEast": {"lat": center[0] + delta, "lng": center[1] + 2 * delta},
+        }
     with st.spinner("Loading map..."):
-        st_folium(build_map(stations), width="900", height=map_height)
+        st_folium(
+            build_map(),
+            key="station_map",
+            feature_group_to_add=build_marker_layer(stations, station_index, bounds, view.get("zoom") or zoom or MAP_INIT_ZOOM),
+            layer_control=folium.LayerControl(),
+            center=center,
+            zoom=zoom,
+            returned_objects=["bounds", "zoom"],
+            width="900",
+            height=map_height,
+        )
 
 
 #--------------------Data--------------------------
 elif st.session_state.active_tab == "Data":
-    left, right = st.columns([1, 4], gap="large")
-
-    with left:
-        st.markdown("<div class='h-chip'>Select Site</div>", unsafe_allow_html=True)
-        site = st.selectbox(
-            "Station ID",
-            options=sorted(stations.keys()),
-            index=0,
-            label_visibility="collapsed",
-            key="site_select"
-        )
-
-        s = stations[site]
-        meta, df_all = get_series_for(s["path"], cache_key=s["cache_key"])
-
-        if df_all.empty:
-            st.warning("No data available for this station.")
-        else:
-            min_d = df_all["DateTime"].min().date()
-            max_d = df_all["DateTime"].max().date()
-
-            st.markdown("<div class='h-chip'>Select Date Range</div>", unsafe_allow_html=True)
-            from_d = st.date_input("From", value=min_d, min_value=min_d, max_value=max_d, key=f"from_{site}")
-            to_d   = st.date_input("To",   value=max_d, min_value=min_d, max_value=max_d, key=f"to_{site}")
-
-            if from_d > to_d:
-                st.info("‘From’ was after ‘To’. Swapped automatically.")
-                from_d, to_d = to_d, from_d
+    from datetime import timedelta
+    from charts import altair_chart, columnar_chart
+    from parsing import get_series_for, pick_variant
+
+    stations, _ = require_stations()
+
+    # Station / date / QC widgets rerun only this function, not the page
+    # around it (styles, logos, navigation, footer); see rerun_bench.py.
+    @st.fragment
+    def data_tab(stations):
+        # Fragment reruns get the catalog of the last full run. Another session
+        # may have reloaded it since (TTL): use that one, without relisting,
+        # so cache_key matches the current file versions.
+        hit, current = load_stations.peek()
+        if hit:
+            stations = current[0]
+        left, right = st.columns([1, 4], gap="large")
+
+        with left:
+            st.markdown("<div class='h-chip'>Select Site</div>", unsafe_allow_html=True)
+            site = st.selectbox(
+                "Station ID",
+                options=sorted(stations.keys()),
+                index=0,
+                label_visibility="collapsed",
+                key="site_select"
+            )
 
-    with right:
-        if 'df_all' in locals() and not df_all.empty:
             s = stations[site]
-            st.markdown(f"<div class='h-chip'>Station: {site}</div>", unsafe_allow_html=True)
+            meta, df_all = get_series_for(s["path"], cache_key=s["cache_key"])
 
-            lat, lon = s["lat"], s["lon"]
-            coords = (
-                f"{lat:.4f}, {lon:.4f}"
-                if (lat is not None and lon is not None)
-                else "coordinates unavailable"
-            )
-            water_body = s["meta"].get("water_body") or "Rhine"
-            sensor = s["meta"].get("sensor_type") or s["meta"].get("sensor") or "the station's sensor"
-            start = df_all["DateTime"].min().date()
-            end   = df_all["DateTime"].max().date()
-
-            paragraph = (
-                f"This station is located at {water_body} ({coords}) and is operated by University of Bonn. "
-                f"It uses {sensor} and its data spans from {start} to {end}."
-            )
-            st.markdown(f"<div class='meta-paragraph'>{paragraph}</div>", unsafe_allow_html=True)
-
-            vertical_datum = s["meta"].get("vertical_datum") or s["meta"].get("datum")
-            if vertical_datum:
-                st.markdown(
-                    f"<div style='color:#d62728; font-weight:700; margin-top:.25rem;'>"
-                    f"Vertical datum: {vertical_datum}"
-                    f"</div>",
-                    unsafe_allow_html=True
+            if s["t_min"] is None:
+                st.warning("No data available for this station.")
+            else:
+                # coverage across all resolution variants, not just the coarsest file
+                min_d = s["t_min"].date()
+                max_d = s["t_max"].date()
+
+                st.markdown("<div class='h-chip'>Select Date Range</div>", unsafe_allow_html=True)
+                from_d = st.date_input("From", value=min_d, min_value=min_d, max_value=max_d, key=f"from_{site}")
+                to_d   = st.date_input("To",   value=max_d, min_value=min_d, max_value=max_d, key=f"to_{site}")
+
+                if from_d > to_d:
+                    st.info("‘From’ was after ‘To’. Swapped automatically.")
+                    from_d, to_d = to_d, from_d
+
+                # Long ranges come from the coarsest file; finer files load only for narrow ranges
+                variant = pick_variant(s["variants"], from_d, to_d + timedelta(days=1))
+                if variant is not s["variants"][0]:
+                    _, df_fine = get_series_for(variant["path"], cache_key=variant["cache_key"])
+                    if df_fine["DateTime"].dt.date.between(from_d, to_d).any():
+                        df_all = df_fine
+                    else:
+                        variant = s["variants"][0]
+                if len(s["variants"]) > 1:
+                    available = ", ".join(v["resolution"] or "?" for v in s["variants"])
+                    st.caption(f"Showing {variant['resolution'] or 'default'} data (available: {available}).")
+
+                st.markdown("<div class='h-chip'>Quality Control</div>", unsafe_allow_html=True)
+                hide_outliers = st.checkbox("Hide flagged outliers", value=True, key="qc_hide")
+                n_flagged = int(df_all["qc_outlier"].sum())
+                n_gaps = int(df_all["qc_gap"].sum())
+                st.caption(f"{n_flagged} outlier(s) flagged, {n_gaps} gap(s) detected.")
+
+        with right:
+            if 'df_all' in locals() and not df_all.empty:
+                s = stations[site]
+                st.markdown(f"<div class='h-chip'>Station: {site}</div>", unsafe_allow_html=True)
+
+                lat, lon = s["lat"], s["lon"]
+                coords = (
+                    f"{lat:.4f}, {lon:.4f}"
+                    if (lat is not None and lon is not None)
+                    else "coordinates unavailable"
                 )
+                water_body = s["meta"].get("water_body") or "Rhine"
+                sensor = s["meta"].get("sensor_type") or s["meta"].get("sensor") or "the station's sensor"
+                start = s["t_min"].date()
+                end   = s["t_max"].date()
+
+                paragraph = (
+                    f"This station is located at {water_body} ({coords}) and is operated by University of Bonn. "
+                    f"It uses {sensor} and its data spans from {start} to {end}."
+                )
+                st.markdown(f"<div class='meta-paragraph'>{paragraph}</div>", unsafe_allow_html=True)
+
+                vertical_datum = s["meta"].get("vertical_datum") or s["meta"].get("datum")
+                if vertical_datum:
+                    st.markdown(
+                        f"<div style='color:#d62728; font-weight:700; margin-top:.25rem;'>"
+                        f"Vertical datum: {vertical_datum}"
+                        f"</div>",
+                        unsafe_allow_html=True
+                    )
 
-            # Space between chart title and plot
-            st.markdown("<div class='chart-spacer'></div>", unsafe_allow_html=True)
-
-            mask = (df_all["DateTime"].dt.date >= from_d) & (df_all["DateTime"].dt.date <= to_d)
-            df_range = df_all.loc[mask].copy()
+                # Space between chart title and plot
+                st.markdown("<div class='chart-spacer'></div>", unsafe_allow_html=True)
 
-            if df_range.empty:
-                st.warning("No data in the selected date range.")
-            else:
-                axis = alt.Axis(
-                    title="Date",
-                    format="%b %d",
-                    labelOverlap=True,
-                    grid=True,
-                )
+                mask = (df_all["DateTime"].dt.date >= from_d) & (df_all["DateTime"].dt.date <= to_d)
+                if hide_outliers:
+                    mask &= ~df_all["qc_outlier"]
+                df_range = df_all.loc[mask]
 
-                ymin = float(df_range["Value"].min())
-                ymax = float(df_range["Value"].max())
-                if ymin == ymax:
-                    pad = abs(ymin) * 0.01 if ymin != 0 else 0.01
-                    ymin, ymax = ymin - pad, ymax + pad
+                if df_range.empty:
+                    st.warning("No data in the selected date range.")
+                elif DATA_CHART == "columnar":
+                    data, spec = columnar_chart(df_range, with_flags=not hide_outliers)
+                    st.vega_lite_chart(data, spec, use_container_width=True)
                 else:
-                    pad = max(2, (ymax - ymin) * 0.02)
-                    ymin, ymax = ymin - pad, ymax + pad
-
-                base_chart = (
-                    alt.Chart(df_range)
-                    .mark_point(size=25, color="#1f77b4")
-                    .encode(
-                        x=alt.X("DateTime:T", axis=axis),
-                        y=alt.Y(
-                            "Value:Q",
-                            title="Water level (meters)",
-                            scale=alt.Scale(domain=[ymin, ymax], nice=False, zero=False),
-                            axis=alt.Axis(tickCount=6, format="~g", grid=True),
-                        ),
-                        tooltip=[
-                            alt.Tooltip("DateTime:T", title="Date"),
-                            alt.Tooltip("Value:Q", title="Water level (m)"),
-                        ],
-                    )
-                    .properties(height=360)
-                ).configure_title(offset=12)
-                st.altair_chart(base_chart.interactive(), use_container_width=True)
+                    st.altair_chart(altair_chart(df_range), use_container_width=True)
+
+    data_tab(stations)
 
 
 #--------------------Publications--------------------------
@@ -444,6 +513,25 @@ elif st.session_state.active_tab == "Upload Data":
        at regular intervals (hourly, daily, or real-time)
     """)
 
+    st.markdown("## **5. Check your file**")
+    st.markdown(
+        "Validate a file against the format above before uploading it. "
+        "The same check is available offline: `python validator.py <file>`."
+    )
+    uploaded = st.file_uploader("Station file", type=["txt"], key="validate_upload")
+    if uploaded is not None:
+        import io
+        from validator import validate_lines
+        report = validate_lines(
+            io.TextIOWrapper(uploaded, encoding="utf-8", errors="replace"),
+            name=uploaded.name,
+        )
+        if report.ok:
+            st.success(f"{uploaded.name}: format OK ({report.n_rows} rows).")
+        else:
+            st.error(f"{uploaded.name}: {report.n_errors} problem(s) found.")
+            st.code(report.summary(), language=None)
+
 
 # =========================
 # FOOTER
@@ -468,3 +556,22 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+
+
+# =========================
+# CACHE STATS (?debug=1)
+# =========================
+if st.query_params.get("debug"):
+    with st.sidebar.expander("Cache stats", expanded=True):
+        st.dataframe(
+            [{**c, "bytes": f"{c['bytes'] / 2**20:.1f} MB", "max_bytes": f"{c['max_bytes'] / 2**20:.0f} MB",
+              "hit_rate": f"{c['hit_rate']:.0%}"} for c in cache_stats()],
+            hide_index=True,
+        )
+    # format findings on files shown anyway (VALIDATION_MODE "warn"); only
+    # from an already loaded catalog, so this never relists
+    hit, catalog = load_stations.peek()
+    if hit and catalog[3]:
+        with st.sidebar.expander(f"Format check ({len(catalog[3])})"):
+            for msg in catalog[3]:
+                st.caption(msg)
@@ -0,0 +1,178 @@
+"""
+Bounded in-process caches for the parsing / WebDAV layer.
+
+Replaces unbounded st.cache_data: every cache has a byte budget, optional
+entry cap and TTL, LRU eviction, and an optional `version` hook so a new
+ETag for a file drops the entries cached for its older versions.
+
+    @cached("station_files", max_bytes=256 << 20, version=lambda a: (a["_path"].href, a["cache_key"]))
+    def load_station_file(_path, cache_key): ...
+
+As with st.cache_data, parameters whose name starts with "_" are not part of
+the key. Cached values are shared between sessions: treat them as read-only.
+"""
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_REGISTRY = {}
+
+def _sizeof(obj, _seen=None) -> int:
+    """Approximate resident bytes (deep for pandas objects and containers)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    usage = getattr(obj, "memory_usage", None)
+    if usage is not None and hasattr(obj, "dtypes"):
+        u = usage(deep=True)
+        return int(u.sum() if hasattr(u, "sum") else u)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k, _seen) + _sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v, _seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _sizeof(vars(obj), _seen)
+    return size
+
+class BoundedCache:
+    """Thread-safe LRU with a byte budget, optional max_entries and TTL (seconds)."""
+    def __init__(self, name: str, max_bytes: int, max_entries: int | None = None, ttl: float | None = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (value, nbytes, stored_at, version)
+        self._versions = {}          # version id -> {version: set(keys)}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) otherwise."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, version=None):
+        nbytes = _sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._drop(key, evicted=False)
+            if version is not None:
+                vid, ver = version
+                for old_ver in [v for v in self._versions.get(vid, {}) if v != ver]:
+                    for old_key in list(self._versions[vid][old_ver]):
+                        self._drop(old_key)
+            if nbytes > self.max_bytes:
+                return  # larger than the whole budget: serve it, don't keep it
+            self._data[key] = (value, nbytes, time.monotonic(), version)
+            self._bytes += nbytes
+            if version is not None:
+                self._versions.setdefault(version[0], {}).setdefault(version[1], set()).add(key)
+            while self._data and (
+                self._bytes > self.max_bytes
+                or (self.max_entries is not None and len(self._data) > self.max_entries)
+            ):
+                self._drop(next(iter(self._data)))
+
+    def latest(self, vid):
+        """Newest value stored under version id `vid`, of any version (not counted as a lookup)."""
+        with self._lock:
+            keys = [k for ks in self._versions.get(vid, {}).values() for k in ks]
+            if not keys:
+                return None
+            return max((self._data[k] for k in keys), key=lambda e: e[2])[0]
+
+    def _drop(self, key, evicted: bool = True):
+        value, nbytes, _, version = self._data.pop(key)
+        self._bytes -= nbytes
+        if evicted:
+            self.evictions += 1
+        if version is not None:
+            vid, ver = version
+            keys = self._versions[vid][ver]
+            keys.discard(key)
+            if not keys:
+                del self._versions[vid][ver]
+                if not self._versions[vid]:
+                    del self._versions[vid]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+def cached(name: str, max_bytes: int, max_entries: int | None = None, ttl: float | None = None, version=None):
+    """
+    Memoize a function in the BoundedCache registered under `name`.
+    `version(args)` gets the bound arguments (dict) and returns
+    (id, version), e.g. (href, etag).
+    """
+    # Streamlit re-executes app.py (and its decorators) on every rerun: keep
+    # the existing cache of that name rather than starting an empty one.
+    cache = _REGISTRY.get(name)
+    if cache is None:
+        cache = _REGISTRY[name] = BoundedCache(name, max_bytes, max_entries, ttl)
+
+    def deco(fn):
+        sig = inspect.signature(fn)
+
+        def bind(args, kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound, tuple((k, v) for k, v in bound.arguments.items() if not k.startswith("_"))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound, key = bind(args, kwargs)
+            hit, value = cache.get(key)
+            if hit:
+                return value
+            value = fn(*args, **kwargs)
+            cache.put(key, value, version(bound.arguments) if version else None)
+            return value
+
+        def peek(*args, **kwargs):
+            """(True, value) if cached, else (False, None); never calls fn."""
+            return cache.get(bind(args, kwargs)[1])
+
+        wrapper.cache = cache
+        wrapper.peek = peek
+        return wrapper
+    return deco
+
+def cache_stats() -> list:
+    return [c.stats() for c in _REGISTRY.values()]
+
+def clear_all():
+    for c in _REGISTRY.values():
+        c.clear()
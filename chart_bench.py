@@ -0,0 +1,156 @@
+"""
+Payload size, server-side marshalling and browser render time of the
+Data-tab chart paths.
+
+    python chart_bench.py                 # synthetic series, 1k .. 1M points
+    python chart_bench.py --file cam4_1h.txt
+    python chart_bench.py --browser       # + time-to-render in headless Chromium
+
+Each chart is rendered through streamlit.testing (AppTest), so the sizes are
+those of the actual ForwardMsg element (Vega-Lite spec + Arrow dataset) sent
+to the browser. Libraries are imported outside the timed window and one
+unmeasured render per path runs first.
+
+--browser serves every chart from a real `streamlit run` and opens it in
+headless Chromium (pip install playwright && playwright install chromium):
+time-to-render is page navigation -> the chart's marks painted, median of
+--repeat loads after one warm-up load.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent
+
+_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+import altair
+import pandas as pd
+import streamlit as st
+from charts import altair_chart, columnar_chart
+
+df = pd.read_pickle({pkl!r})
+t0 = time.perf_counter()
+if {path!r} == "columnar":
+    data, spec = columnar_chart(df)
+    st.vega_lite_chart(data, spec, use_container_width=True)
+else:
+    st.altair_chart(altair_chart(df), use_container_width=True)
+st.session_state["elapsed"] = time.perf_counter() - t0
+"""
+
+_APP = """
+import sys
+sys.path.insert(0, {root!r})
+import pandas as pd
+import streamlit as st
+from charts import altair_chart, columnar_chart
+
+df = pd.read_pickle(st.query_params["pkl"])
+if st.query_params["path"] == "columnar":
+    data, spec = columnar_chart(df)
+    st.vega_lite_chart(data, spec, use_container_width=True)
+else:
+    st.altair_chart(altair_chart(df), use_container_width=True)
+"""
+
+# the chart's marks, canvas or SVG renderer
+_DRAWN = '[data-testid="stVegaLiteChart"] canvas, [data-testid="stVegaLiteChart"] svg .marks'
+_PAINTED = "() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(() => r(performance.now()))))"
+
+def _synthetic(n: int) -> pd.DataFrame:
+    from qc import run_qc
+    t = pd.date_range("2020-01-01", periods=n, freq="5min")
+    v = 47 + np.sin(np.arange(n) / 300) + np.random.default_rng(0).normal(0, 0.02, n)
+    return run_qc(pd.DataFrame({"DateTime": t, "Value": v}), pd.Timedelta("5min"))
+
+def measure(df: pd.DataFrame, path: str, tmp: Path) -> tuple:
+    """(element bytes, marshalling seconds) for one render of df."""
+    from streamlit.testing.v1 import AppTest
+
+    pkl = tmp / "df.pkl"
+    df.to_pickle(pkl)
+    script = _SCRIPT.format(root=str(ROOT), pkl=str(pkl), path=path)
+    at = AppTest.from_string(script, default_timeout=600).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    el = at.main.children[0] if isinstance(at.main.children, list) else next(iter(at.main.children.values()))
+    return el.proto.ByteSize(), at.session_state["elapsed"]
+
+def browser_render(pkls: dict, tmp: Path, repeat: int) -> dict:
+    """{(label, path): median ms from navigation to painted chart} in headless Chromium."""
+    from urllib.parse import urlencode
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        raise SystemExit("--browser needs playwright: pip install playwright && playwright install chromium")
+    from rerun_bench import _free_port, start_server
+
+    app = tmp / "chart_app.py"
+    app.write_text(_APP.format(root=str(ROOT)))
+    port = _free_port()
+    proc = start_server(str(app), port)
+    out = {}
+    try:
+        with sync_playwright() as pw:
+            browser = pw.chromium.launch()
+            page = browser.new_page(viewport={"width": 1400, "height": 900})
+            for (label, path), pkl in pkls.items():
+                url = f"http://127.0.0.1:{port}/?" + urlencode({"pkl": str(pkl), "path": path})
+                samples = []
+                for _ in range(repeat + 1):
+                    page.goto(url, wait_until="commit")
+                    page.wait_for_selector(_DRAWN, timeout=600_000)
+                    samples.append(page.evaluate(_PAINTED))
+                out[label, path] = statistics.median(samples[1:])
+            browser.close()
+    finally:
+        proc.terminate()
+        proc.wait()
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", help="station .txt to chart instead of synthetic data")
+    ap.add_argument("--sizes", default="1000,10000,100000,1000000")
+    ap.add_argument("--browser", action="store_true", help="also measure time-to-render in headless Chromium")
+    ap.add_argument("--repeat", type=int, default=5, help="page loads per chart for --browser")
+    args = ap.parse_args(argv)
+
+    if args.file:
+        from parsing import load_station_file
+        frames = [(Path(args.file).name, load_station_file(Path(args.file), args.file)[1])]
+    else:
+        frames = [(f"{int(n):,} pts", _synthetic(int(n))) for n in args.sizes.split(",")]
+
+    print(f"{'series':<16}{'altair':>22}{'columnar':>22}{'size ratio':>12}")
+    with tempfile.TemporaryDirectory() as d:
+        # unmeasured warm-up: first-use costs (altair schema, Arrow) out of row one
+        for path in ("altair", "columnar"):
+            measure(frames[0][1].head(100), path, Path(d))
+        pkls = {}
+        for i, (label, df) in enumerate(frames):
+            a_bytes, a_sec = measure(df, "altair", Path(d))
+            c_bytes, c_sec = measure(df, "columnar", Path(d))
+            print(f"{label:<16}{a_bytes / 1e6:>10.2f} MB {a_sec * 1e3:>7.0f} ms"
+                  f"{c_bytes / 1e6:>10.2f} MB {c_sec * 1e3:>7.0f} ms{a_bytes / c_bytes:>11.2f}x")
+            if args.browser:
+                df.to_pickle(Path(d) / f"series{i}.pkl")
+                pkls.update({(label, path): Path(d) / f"series{i}.pkl" for path in ("altair", "columnar")})
+
+        if args.browser:
+            ms = browser_render(pkls, Path(d), args.repeat)
+            print(f"\ntime-to-render in headless Chromium (navigation -> chart painted, median of {args.repeat})")
+            print(f"{'series':<16}{'altair':>12}{'columnar':>12}")
+            for label, _ in frames:
+                print(f"{label:<16}{ms[label, 'altair']:>9.0f} ms{ms[label, 'columnar']:>9.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Data-tab chart builders.
+
+Both paths end up as a Vega-Lite chart in the browser. Streamlit ships the
+chart data as an Arrow table, so what matters is which columns go in it:
+the altair path sends the whole df_range (nanosecond timestamps, float64
+values, every QC column plus a label column), the columnar path sends only
+epoch milliseconds (int64), float32 values and, when shown, the outlier flag.
+"""
+import numpy as np
+import pandas as pd
+
+POINT_COLOR = "#1f77b4"
+FLAG_COLOR = "#d62728"
+
+def y_domain(values) -> list:
+    """Padded [ymin, ymax] for the water-level axis."""
+    ymin = float(np.nanmin(values))
+    ymax = float(np.nanmax(values))
+    if ymin == ymax:
+        pad = abs(ymin) * 0.01 if ymin != 0 else 0.01
+    else:
+        pad = max(2, (ymax - ymin) * 0.02)
+    return [ymin - pad, ymax + pad]
+
+def columnar_frame(df_range: pd.DataFrame, with_flags: bool = True) -> pd.DataFrame:
+    """Minimal typed columns: t (epoch ms, int64), v (float32), flag (bool)."""
+    cols = {
+        "t": df_range["DateTime"].to_numpy("datetime64[ms]").astype(np.int64),
+        "v": df_range["Value"].to_numpy(np.float32),
+    }
+    if with_flags:
+        cols["flag"] = df_range["qc_outlier"].to_numpy(bool)
+    return pd.DataFrame(cols)
+
+def columnar_chart(df_range: pd.DataFrame, with_flags: bool = True) -> tuple:
+    """(data, spec) for st.vega_lite_chart; same look as altair_chart()."""
+    data = columnar_frame(df_range, with_flags)
+    tooltip = [
+        {"field": "t", "type": "temporal", "title": "Date"},
+        {"field": "v", "type": "quantitative", "title": "Water level (m)", "format": ".3f"},
+    ]
+    color = {"value": POINT_COLOR}
+    if with_flags:
+        color = {"condition": {"test": "datum.flag", "value": FLAG_COLOR}, "value": POINT_COLOR}
+        tooltip.append({"field": "flag", "type": "nominal", "title": "Outlier"})
+    spec = {
+        "height": 360,
+        "mark": {"type": "point", "size": 25},
+        "params": [{"name": "zoom", "select": "interval", "bind": "scales"}],
+        "encoding": {
+            "x": {
+                "field": "t", "type": "temporal",
+                "axis": {"title": "Date", "format": "%b %d", "labelOverlap": True, "grid": True},
+            },
+            "y": {
+                "field": "v", "type": "quantitative", "title": "Water level (meters)",
+                "scale": {"domain": y_domain(data["v"]), "nice": False, "zero": False},
+                "axis": {"tickCount": 6, "format": "~g", "grid": True},
+            },
+            "color": color,
+            "tooltip": tooltip,
+        },
+        "config": {"title": {"offset": 12}},
+    }
+    return data, spec
+
+def altair_chart(df_range: pd.DataFrame):
+    """Row-oriented altair chart over the full df_range (the original chart path)."""
+    import altair as alt
+
+    df_range = df_range.copy()
+    df_range["QC"] = df_range["qc_outlier"].map({True: "outlier", False: "ok"})
+    axis = alt.Axis(
+        title="Date",
+        format="%b %d",
+        labelOverlap=True,
+        grid=True,
+    )
+    ymin, ymax = y_domain(df_range["Value"])
+
+    base_chart = (
+        alt.Chart(df_range)
+        .mark_point(size=25)
+        .encode(
+            x=alt.X("DateTime:T", axis=axis),
+            color=alt.Color(
+                "QC:N",
+                scale=alt.Scale(domain=["ok", "outlier"], range=[POINT_COLOR, FLAG_COLOR]),
+                legend=None,
+            ),
+            y=alt.Y(
+                "Value:Q",
+                title="Water level (meters)",
+                scale=alt.Scale(domain=[ymin, ymax], nice=False, zero=False),
+                axis=alt.Axis(tickCount=6, format="~g", grid=True),
+            ),
+            tooltip=[
+                alt.Tooltip("DateTime:T", title="Date"),
+                alt.Tooltip("Value:Q", title="Water level (m)"),
+                alt.Tooltip("QC:N", title="QC"),
+            ],
+        )
+        .properties(height=360)
+    ).configure_title(offset=12)
+    return base_chart.interactive()
@@ -26,6 +26,9 @@ FOOTER_LOGO_WIDTH  = 120
 MAP_INIT_CENTER = (20, 0)   # world view
 MAP_INIT_ZOOM   = 2
 MAP_HEIGHT_PX   = 580
+MAP_GRID_CELL_DEG = 1.0   # spatial index cell size
+MAP_MAX_MARKERS   = 200   # above this many stations in view, send clusters
+MAP_FOCUS_ZOOM    = 10    # zoom for ?station= / ?lat=&lon= deep links
 
 # -------- WebDAV (Sciebo) --------
 WEBDAV_BASE   = st.secrets.get("WEBDAV_BASE", "https://uni-bonn.sciebo.de/public.php/webdav/")
@@ -33,4 +36,40 @@ WEBDAV_HOST   = st.secrets.get("WEBDAV_HOST", "https://uni-bonn.sciebo.de")
 WEBDAV_FOLDER = st.secrets.get("WEBDAV_FOLDER", "solutions/")
 WEBDAV_TOKEN  = st.secrets.get("WEBDAV_TOKEN", "")
 WEBDAV_PASS   = st.secrets.get("WEBDAV_PASS", "")
+WEBDAV_SYNC   = st.secrets.get("WEBDAV_SYNC", True)   # try RFC 6578 sync-collection deltas
+WEBDAV_TIMEOUT = 30   # seconds to connect / between bytes of a response
 
+# -------- Storage (see storage.py) --------
+# "webdav": read the share above directly
+# "local":  read *.txt under STORAGE_LOCAL_DIR (local disk, NFS mount, synced folder)
+# "mirror": sync the share into STORAGE_MIRROR_DIR and read from there
+STORAGE_BACKEND    = st.secrets.get("STORAGE_BACKEND", "webdav")
+STORAGE_LOCAL_DIR  = Path(st.secrets.get("STORAGE_LOCAL_DIR", "solutions"))
+STORAGE_MIRROR_DIR = Path(st.secrets.get("STORAGE_MIRROR_DIR", ".mirror"))
+
+
+# -------- Quality control --------
+QC_WINDOW     = 25     # rolling median/MAD window (samples, odd)
+QC_MAD_K      = 3.5    # flag |x - median| > k * 1.4826 * MAD
+QC_MIN_DEV    = 0.05   # ...and > this absolute deviation (data units)
+QC_GAP_FACTOR = 3.0    # gap if spacing > factor * nominal cadence
+
+# -------- Data tab --------
+# A finer-resolution file (e.g. cam4_5m.txt next to cam4_1h.txt) is loaded
+# only if the selected range holds at most this many nominal samples in it.
+DATA_MAX_POINTS = 5000
+# "columnar": typed epoch-ms/float32 columns via st.vega_lite_chart (see charts.py)
+# "altair":   the full frame via st.altair_chart
+DATA_CHART = "columnar"
+
+# -------- Upload validation --------
+# How discovery treats files whose header fails validator.py:
+# "off" (parse anyway), "warn" (parse; findings go to the log and the ?debug=1
+# sidebar, not the public page) or "quarantine" (skip unparsed, with a warning).
+# The parser tolerates extra/reordered keys and other column names that the
+# strict format check rejects, so quarantine is opt-in.
+VALIDATION_MODE = "warn"
+
+# -------- Caches (see cache.py) --------
+CACHE_STATION_FILES_MB = 256   # budget for parsed station files
+CACHE_CATALOG_TTL_S    = 300   # re-list the WebDAV folder after this many seconds
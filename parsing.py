@@ -3,10 +3,13 @@ import re
 from io import StringIO
 from pathlib import Path
 import pandas as pd
-import streamlit as st
 
+from cache import cached
 from utils import fig_png_b64
-from webdav_client import list_remote_txts, remote_snapshot_hash, RemoteTxt
+from qc import run_qc
+from validator import validate_lines, RESOLUTION_RE
+from config import VALIDATION_MODE, DATA_MAX_POINTS, CACHE_STATION_FILES_MB
+from storage import get_backend
 
 # ---- metadata parsing helpers ----
 META_RE = re.compile(r"^#\s*([^:]+)\s*:\s*(.*)$")
@@ -27,9 +30,21 @@ def _to_float_any(x):
         return None
     return float(m.group(0).replace(",", "."))
 
-@st.cache_data(show_spinner=False)
+# Nominal cadence from the `<siteID>_<temporalResolution>.txt` naming convention
+_RES_UNIT = {"s": "s", "sec": "s", "m": "min", "min": "min", "h": "h", "hr": "h", "d": "D", "day": "D"}
+def _resolution_from_name(name: str):
+    m = RESOLUTION_RE.search(Path(name).stem)
+    if not m:
+        return None
+    return pd.Timedelta(int(m.group(1)), unit=_RES_UNIT[m.group(2).lower()])
+
+def _file_version(args) -> tuple:
+    """(href, cache_key): a new ETag/mtime for a file evicts its older parses."""
+    return getattr(args["_path"], "href", str(args["_path"])), args["cache_key"]
+
+@cached("station_files", max_bytes=CACHE_STATION_FILES_MB << 20, version=_file_version)
 def load_station_file(_path, cache_key: str):
-    """Parse a station .txt (remote path-like) and return (meta, df)."""
+    """Parse a station .txt (storage path-like) and return (meta, df)."""
     lines = _path.read_text(encoding="utf-8", errors="ignore").splitlines()
 
     meta = {}
@@ -67,47 +82,209 @@ def load_station_file(_path, cache_key: str):
 
     df = df[[dt_col, val_col]].rename(columns={dt_col: "DateTime", val_col: "Value"})
     df["DateTime"] = pd.to_datetime(df["DateTime"], errors="coerce")
-    df = df.dropna(subset=["DateTime"]).sort_values("DateTime").reset_index(drop=True)
+    df = df.dropna(subset=["DateTime"]).sort_values("DateTime", kind="stable").reset_index(drop=True)
+    # the previous parse of this file (still cached until this one replaces it)
+    prev = load_station_file.cache.latest(_file_version({"_path": _path, "cache_key": cache_key})[0])
+    df = run_qc(df, _resolution_from_name(_path.name), prev=prev[1] if prev else None)
     return meta, df
 
-@st.cache_data(show_spinner=False)
+@cached("validation", max_bytes=4 << 20, version=_file_version)
+def check_station_file(_path, cache_key: str):
+    """Header-only validation; streams just the first lines of the file."""
+    lines = _path.iter_lines()
+    try:
+        return validate_lines(lines, name=_path.name, header_only=True)
+    finally:
+        lines.close()
+
+_SPAN_HEAD = 1 << 16   # bytes read from the start (header + first rows) ...
+_SPAN_TAIL = 1 << 12   # ... and from the end of a file for its time span
+_FIELD_SEP = re.compile(r"[,;\t]")
+
+def _first_time(lines):
+    """First timestamp among data lines (comments, blanks and the column header skipped)."""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        t = pd.to_datetime(_FIELD_SEP.split(line, 1)[0].strip(), errors="coerce")
+        if not pd.isna(t):
+            return t
+    return None
+
+@cached("file_spans", max_bytes=1 << 20, version=_file_version)
+def file_span(_path, cache_key: str):
+    """
+    (first, last) timestamp of a station file from a read of its head and
+    tail, without parsing it; (None, None) if they cannot be found. Rows
+    are in time order (see validator.py), so this is the file's coverage.
+    """
+    head = _path.read_range(0, _SPAN_HEAD).decode("utf-8", "ignore")
+    size = _path.size or 0
+    if size > _SPAN_HEAD:
+        tail = _path.read_range(size - _SPAN_TAIL).decode("utf-8", "ignore")
+        tail_lines = tail.splitlines()[1:]    # the first one may be cut
+    else:
+        tail_lines = head.splitlines()
+    return _first_time(head.splitlines()), _first_time(reversed(tail_lines))
+
+def _file_key(p) -> str:
+    return f'{p.name}|{p.href}|{p.etag}|{p.mtime}|{p.size}'
+
+def _passes_validation(p, file_key: str, issues: list, notes: list) -> bool:
+    """Whether to parse p; quarantine goes to issues, "warn" findings to notes."""
+    if VALIDATION_MODE == "off":
+        return True
+    report = check_station_file(p, cache_key=file_key)
+    if report.header_ok:
+        return True
+    line_no, msg = report.header_error
+    if VALIDATION_MODE == "quarantine":
+        issues.append(f"Quarantined {p.name} (line {line_no}: {msg})")
+        return False
+    notes.append(f"{p.name}: line {line_no}: {msg}")
+    return True
+
+def _variant(p, file_key: str) -> dict:
+    m = RESOLUTION_RE.search(p.stem)
+    return {
+        "resolution": p.stem.rsplit("_", 1)[-1] if m else "",
+        "step": _resolution_from_name(p.name),
+        "path": p,
+        "cache_key": file_key,
+    }
+
+def _coarse_to_fine(variants) -> list:
+    """Sorted coarse -> fine (stable); files without a resolution suffix sort last."""
+    return sorted(variants, key=lambda v: v["step"] or pd.Timedelta(0), reverse=True)
+
+def _load_coarsest(variants: list, issues: list):
+    """(meta, df) of the coarsest file that parses, dropping the ones that fail; None if none does."""
+    while variants:
+        p = variants[0]["path"]
+        try:
+            return load_station_file(p, cache_key=variants[0]["cache_key"])
+        except Exception as e:
+            issues.append(f"Skipped {p.name}: {e}")
+            variants.pop(0)
+    return None
+
+@cached("catalog", max_bytes=64 << 20, max_entries=2)
 def discover_stations(snapshot_hash: str):
-    """Build stations dict from remote WebDAV folder."""
-    items = list_remote_txts()
+    """
+    Build stations dict from the configured storage backend.
+    Files are grouped per site ID (`<siteID>_<temporalResolution>.txt`); each
+    station lists its resolution variants coarsest first, and only the
+    coarsest file is parsed for the summary (coverage, popup chart).
+    Returns (stations, issues, notes): issues are messages about skipped,
+    quarantined, ignored or merged files; notes are format findings on files
+    that were shown anyway (VALIDATION_MODE "warn"), for maintainers.
+    """
+    backend = get_backend()
+    groups = {}
+    for it in backend.list():
+        p = backend.file(it)
+        groups.setdefault(p.stem.split("_")[0], []).append(p)
+
+    # Parse each group's coarsest file to learn its station ID, then merge
+    # groups that declare the same station (e.g. CAM4_1h.txt + cam4_5m.txt).
+    issues, notes, by_sid = [], [], {}
+    for prefix, paths in groups.items():
+        variants = {}
+        for p in paths:
+            try:
+                file_key = _file_key(p)
+                if _passes_validation(p, file_key, issues, notes):
+                    variants[p.href] = _variant(p, file_key)
+            except Exception as e:
+                issues.append(f"Skipped {p.name}: {e}")
+        variants = _coarse_to_fine(variants.values())
+        loaded = _load_coarsest(variants, issues)
+        if loaded is None:
+            continue
+        sid = str(loaded[0].get("station") or prefix)
+        if sid in by_sid:
+            issues.append(
+                f"Station {sid} is declared by {', '.join(sorted(v['path'].name for v in variants))} and "
+                f"{', '.join(sorted(v['path'].name for v in by_sid[sid]))}; showing them as one station"
+            )
+        by_sid.setdefault(sid, []).extend(variants)
+
     stations = {}
-    for it in items:
+    for sid, variants in by_sid.items():
+        # one file per resolution; name every file that loses out
+        kept = {}
+        for v in _coarse_to_fine(variants):
+            other = kept.setdefault(v["resolution"], v)
+            if other is not v:
+                issues.append(
+                    f"Station {sid}: ignored {v['path'].href}, same resolution "
+                    f"'{v['resolution'] or 'none'}' as {other['path'].href}"
+                )
+        variants = list(kept.values())
+        loaded = _load_coarsest(variants, issues)
+        if loaded is None:
+            continue
+        meta, df = loaded
+        p = variants[0]["path"]
+
+        # Coverage of every variant: a finer file (e.g. a real-time _5m next
+        # to a daily-built _1h) may reach further than the coarsest one.
+        if not df.empty:
+            variants[0].update(t_min=df["DateTime"].min(), t_max=df["DateTime"].max())
+        for v in variants[1:]:
+            try:
+                t_min, t_max = file_span(v["path"], cache_key=v["cache_key"])
+            except Exception:
+                t_min = t_max = None
+            if t_min is not None and t_max is not None:
+                v.update(t_min=t_min, t_max=t_max)
+        spans = [v for v in variants if "t_min" in v]
+
+        lat = None
+        for k in ["latitude", "lat", "y", "northing"]:
+            lat = _to_float_any(meta.get(k))
+            if lat is not None: break
+        lon = None
+        for k in ["longitude", "lon", "long", "lng", "x", "easting", "longtitude"]:
+            lon = _to_float_any(meta.get(k))
+            if lon is not None: break
+
+        df_clean = df[~df["qc_outlier"]]
+        df_small = df_clean if len(df_clean) <= 600 else df_clean.iloc[:: max(1, len(df_clean)//600)]
         try:
-            p = RemoteTxt(name=it["name"], href=it["href"], etag=it["etag"], mtime=it["mtime"], size=it["size"])
-            file_key = f'{p.name}|{p.href}|{p.etag}|{p.mtime}|{p.size}'
-            meta, df = load_station_file(p, cache_key=file_key)
-            sid = str(meta.get("station") or p.stem.split("_")[0])
-
-            lat = None
-            for k in ["latitude", "lat", "y", "northing"]:
-                lat = _to_float_any(meta.get(k))
-                if lat is not None: break
-            lon = None
-            for k in ["longitude", "lon", "long", "lng", "x", "easting", "longtitude"]:
-                lon = _to_float_any(meta.get(k))
-                if lon is not None: break
-
-            df_small = df if len(df) <= 600 else df.iloc[:: max(1, len(df)//600)]
             chart_b64 = fig_png_b64(df_small) if not df_small.empty else ""
-
-            stations[sid] = {
-                "id": sid, "lat": lat, "lon": lon, "meta": meta, "path": p,
-                "n": len(df),
-                "t_min": df["DateTime"].min() if not df.empty else None,
-                "t_max": df["DateTime"].max() if not df.empty else None,
-                "units": meta.get("units") or meta.get("unit") or "",
-                "chart_b64": chart_b64,
-                "cache_key": file_key,
-            }
         except Exception as e:
-            import streamlit as st
-            st.warning(f"Skipped {it['name']}: {e}")
-    return stations
+            issues.append(f"No preview chart for {p.name}: {e}")
+            chart_b64 = ""
+
+        stations[sid] = {
+            "id": sid, "lat": lat, "lon": lon, "meta": meta, "path": p,
+            "n": len(df),
+            "t_min": min(v["t_min"] for v in spans) if spans else None,
+            "t_max": max(v["t_max"] for v in spans) if spans else None,
+            "units": meta.get("units") or meta.get("unit") or "",
+            "chart_b64": chart_b64,
+            "cache_key": variants[0]["cache_key"],
+            "variants": variants,
+        }
+    return stations, issues, notes
+
+def pick_variant(variants: list, start, end, max_points: int = DATA_MAX_POINTS) -> dict:
+    """
+    Finest resolution variant whose nominal point count over [start, end]
+    stays within max_points; the coarsest one otherwise. Only variants whose
+    coverage (t_min/t_max, where known) overlaps the range are considered.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    span = end - start
+    covering = [v for v in variants if "t_min" not in v or (v["t_min"] < end and v["t_max"] >= start)]
+    covering = covering or variants
+    choice = covering[0]
+    for v in covering[1:]:
+        if v["step"] is not None and span / v["step"] <= max_points:
+            choice = v
+    return choice
 
-@st.cache_data(show_spinner=False)
 def get_series_for(_path, cache_key: str):
     return load_station_file(_path, cache_key)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from config import QC_WINDOW, QC_MAD_K, QC_MIN_DEV, QC_GAP_FACTOR
+
+def _robust_flags(values: pd.Series, window: int, k: float) -> pd.Series:
+    """Centered rolling median/MAD outlier flag (True = outlier)."""
+    min_periods = window // 2 + 1
+    med = values.rolling(window, center=True, min_periods=min_periods).median()
+    dev = (values - med).abs()
+    mad = dev.rolling(window, center=True, min_periods=min_periods).median() * 1.4826
+    # The absolute floor keeps smooth trends (tides, floods) from being flagged
+    # when the windowed MAD collapses to near zero.
+    return (dev > k * mad) & (dev > QC_MIN_DEV)
+
+def _cadence(dt: pd.Series, nominal) -> pd.Timedelta | None:
+    if nominal is not None:
+        return nominal
+    step = dt.diff().median()
+    return None if pd.isna(step) else step
+
+def run_qc(df: pd.DataFrame, nominal=None, prev: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Drop duplicate timestamps and add flag columns next to DateTime/Value:
+      qc_outlier: rolling median/MAD outlier
+      qc_gap:     first sample after a gap longer than QC_GAP_FACTOR * cadence
+    `nominal` is the file's nominal cadence (Timedelta) or None to infer it.
+    `prev` is an earlier run_qc() result for the same file: if the file only
+    grew since, its flags are reused and just the appended window plus the
+    lookback it needs is recomputed.
+    """
+    df = df.loc[~df["DateTime"].duplicated(keep="first"), ["DateTime", "Value"]].reset_index(drop=True)
+    df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
+
+    window = QC_WINDOW | 1
+    half = window // 2
+
+    # A point's MAD depends on values up to 2*half away on either side.
+    start = 0
+    if prev is not None and 0 < len(prev) <= len(df):
+        n_old = len(prev)
+        same = (
+            np.array_equal(prev["DateTime"].to_numpy(), df["DateTime"].to_numpy()[:n_old])
+            and np.array_equal(prev["Value"].to_numpy(), df["Value"].to_numpy()[:n_old], equal_nan=True)
+        )
+        if same:
+            start = max(0, n_old - 2 * half)
+
+    lo = max(0, start - 2 * half)
+    tail = _robust_flags(df["Value"].iloc[lo:], window, QC_MAD_K).iloc[start - lo:]
+    if start:
+        outlier = np.concatenate([prev["qc_outlier"].to_numpy()[:start], tail.to_numpy()])
+    else:
+        outlier = tail.to_numpy()
+    df["qc_outlier"] = outlier.astype(bool)
+
+    step = _cadence(df["DateTime"], nominal)
+    if step is None:
+        df["qc_gap"] = False
+    else:
+        df["qc_gap"] = (df["DateTime"].diff() > step * QC_GAP_FACTOR).to_numpy()
+    return df
@@ -0,0 +1,160 @@
+"""
+Server CPU and round-trip latency of Data-tab interactions.
+
+    python rerun_bench.py                    # starts `streamlit run app.py` headless
+    python rerun_bench.py --app app.py --repeat 30
+
+Drives a real server over its websocket the way the browser does: opens the
+Data tab, then toggles "Hide flagged outliers", moves the From date and
+switches station, sending each change as a rerun request (scoped to the
+widget's fragment when the server rendered it inside one). Latency is
+request -> script_finished; CPU is the server process's user+system time
+over the same interval (read from /proc, so Linux only). The app reads its
+stations from whatever storage backend config.py points at.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+_TICK = os.sysconf("SC_CLK_TCK")
+
+def _cpu_seconds(pid: int) -> float:
+    """user + system CPU time of a process."""
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _TICK
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app: str, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless=true",
+         f"--server.port={port}", "--server.fileWatcherType=none",
+         "--browser.gatherUsageStats=false"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("streamlit server did not come up")
+
+class Session:
+    """One browser tab: widget ids by key, the fragment each widget lives in."""
+    def __init__(self, ws, pid: int):
+        self.ws = ws
+        self.pid = pid
+        self.widgets = {}   # user key -> (widget id, fragment id, element proto)
+
+    def _id(self, key: str) -> str:
+        return self.widgets[key][0]
+
+    async def rerun(self, states: list, fragment_key: str | None = None) -> tuple:
+        """Send a rerun and wait for it to finish; (seconds, cpu seconds, fragment id used)."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        cs = msg.rerun_script
+        cs.query_string = ""
+        cs.widget_states.widgets.extend(states)
+        fragment_id = self.widgets[fragment_key][1] if fragment_key else ""
+        cs.fragment_id = fragment_id
+
+        cpu0, t0 = _cpu_seconds(self.pid), time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg.FromString(await self.ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                el = fm.delta.new_element
+                widget = getattr(el, el.WhichOneof("type"))
+                if el.WhichOneof("type") == "exception":
+                    raise RuntimeError(f"app raised {widget.type}: {widget.message}")
+                wid = getattr(widget, "id", "")
+                if wid and "-" in wid:
+                    self.widgets[wid.rsplit("-", 1)[-1]] = (wid, fm.delta.fragment_id, widget)
+            elif kind == "script_finished":
+                return time.perf_counter() - t0, _cpu_seconds(self.pid) - cpu0, fragment_id
+
+def _state(wid: str, **value):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+    return WidgetState(id=wid, **value)
+
+async def bench(port: int, pid: int, repeat: int, warmup: int) -> dict:
+    from datetime import date, timedelta
+    import websockets
+
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                  max_size=None) as ws:
+        s = Session(ws, pid)
+        await s.rerun([])
+        await s.rerun([_state(s._id("nav_Data"), trigger_value=True)])
+        sites = list(s.widgets["site_select"][2].options)
+
+        hide, day, site_i = True, 0, 0
+        def states():
+            site = sites[site_i]
+            from_w = s.widgets.get(f"from_{site}")
+            out = [_state(s._id("site_select"), string_value=site),
+                   _state(s._id("qc_hide"), bool_value=hide)]
+            if from_w:
+                lo = date.fromisoformat(from_w[2].min.replace("/", "-"))
+                out.append(_state(from_w[0], string_array_value={"data": [(lo + timedelta(days=day)).isoformat()]}))
+            return out
+
+        await s.rerun(states())
+        results = {"toggle QC checkbox": [], "change From date": [], "switch station": []}
+        for i in range(warmup + repeat):
+            for name in results:
+                if name == "toggle QC checkbox":
+                    hide, key = not hide, "qc_hide"
+                elif name == "change From date":
+                    day, key = 1 - day, f"from_{sites[site_i]}"
+                else:
+                    site_i, key = (site_i + 1) % len(sites), "site_select"
+                sample = await s.rerun(states(), key)
+                if i >= warmup:
+                    results[name].append(sample)
+        return results
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--app", default="app.py")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--warmup", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    port = _free_port()
+    proc = start_server(args.app, port)
+    try:
+        results = asyncio.run(bench(port, proc.pid, args.repeat, args.warmup))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"{args.app}: {args.repeat} interactions each")
+    print(f"{'interaction':<22}{'scope':>10}{'median ms':>11}{'p90 ms':>9}{'CPU ms':>9}")
+    for name, samples in results.items():
+        lat = sorted(t for t, _, _ in samples)
+        cpu = statistics.mean(c for _, c, _ in samples)
+        scope = "fragment" if samples[0][2] else "full"
+        print(f"{name:<22}{scope:>10}{statistics.median(lat) * 1e3:>11.1f}"
+              f"{lat[int(len(lat) * 0.9) - 1] * 1e3:>9.1f}{cpu * 1e3:>9.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import math
+
+from config import MAP_GRID_CELL_DEG
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _wrap_lon(lon: float) -> float:
+    return (lon + 180.0) % 360.0 - 180.0
+
+def bounds_from_folium(bounds) -> tuple | None:
+    """st_folium 'bounds' dict -> (south, west, north, east), or None if absent."""
+    try:
+        sw, ne = bounds["_southWest"], bounds["_northEast"]
+        s, w, n, e = float(sw["lat"]), float(sw["lng"]), float(ne["lat"]), float(ne["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if e - w >= 360:
+        return (s, -180.0, n, 180.0)
+    return (s, _wrap_lon(w), n, _wrap_lon(e))
+
+class StationIndex:
+    """
+    Uniform lat/lon grid over the stations that have coordinates.
+    Answers viewport (bounding-box) and nearest-station queries without
+    touching every station.
+    """
+    def __init__(self, stations: dict, cell_deg: float = MAP_GRID_CELL_DEG):
+        self.cell = float(cell_deg)
+        self.ncols = int(math.ceil(360.0 / self.cell))
+        self.coords = {}
+        self.cells = {}   # (row, col) -> [sid]
+        self.rows = {}    # row -> [sid]
+        for sid, s in stations.items():
+            if s.get("lat") is None or s.get("lon") is None:
+                continue
+            lat, lon = float(s["lat"]), _wrap_lon(float(s["lon"]))
+            self.coords[sid] = (lat, lon)
+            i, j = self._cell_of(lat, lon)
+            self.cells.setdefault((i, j), []).append(sid)
+            self.rows.setdefault(i, []).append(sid)
+
+    def __len__(self):
+        return len(self.coords)
+
+    def _row_of(self, lat: float) -> int:
+        return int(math.floor((min(max(lat, -90.0), 90.0) + 90.0) / self.cell))
+
+    def _col_of(self, lon: float) -> int:
+        return int(math.floor((_wrap_lon(lon) + 180.0) / self.cell)) % self.ncols
+
+    def _cell_of(self, lat: float, lon: float) -> tuple:
+        return self._row_of(lat), self._col_of(lon)
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> list:
+        """Station IDs inside the box; west > east means it crosses the antimeridian."""
+        if west > east:
+            return self.bbox(south, west, north, 180.0) + self.bbox(south, -180.0, north, east)
+
+        i0, i1 = self._row_of(south), self._row_of(north)
+        j0 = self._col_of(west)
+        j1 = self.ncols - 1 if east >= 180.0 else self._col_of(east)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            # Wide views: cheaper to walk the occupied cells than the covered ones.
+            keys = [k for k in self.cells if i0 <= k[0] <= i1 and j0 <= k[1] <= j1]
+        else:
+            keys = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self.cells]
+
+        out = []
+        for k in keys:
+            for sid in self.cells[k]:
+                lat, lon = self.coords[sid]
+                if south <= lat <= north and west <= lon <= east:
+                    out.append(sid)
+        return out
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> list:
+        """The k closest station IDs by great-circle distance, as [(sid, km)]."""
+        if not self.coords:
+            return []
+        k = min(k, len(self.coords))
+        i0 = self._row_of(lat)
+        nrows = int(math.ceil(180.0 / self.cell)) + 1
+
+        # Widen the latitude band until it holds k stations; great-circle distance
+        # is never less than the latitude difference, so rows further than the
+        # current k-th best distance can be skipped.
+        cand, r = [], 0
+        while len(cand) < k and r <= nrows:
+            for i in {i0 - r, i0 + r}:
+                cand.extend(self.rows.get(i, []))
+            r += 1
+        best = sorted((haversine_km(lat, lon, *self.coords[sid]), sid) for sid in cand)[:k]
+        reach = int(math.ceil(math.degrees(best[-1][0] / EARTH_RADIUS_KM) / self.cell))
+        for d in range(r, reach + 1):
+            for i in {i0 - d, i0 + d}:
+                cand.extend(self.rows.get(i, []))
+        best = sorted((haversine_km(lat, lon, *self.coords[sid]), sid) for sid in cand)[:k]
+        return [(sid, km) for km, sid in best]
+
+    def clusters(self, sids, cell_deg: float) -> list:
+        """Group station IDs into cell_deg bins: [{"lat","lon","ids"}] (mean position)."""
+        bins = {}
+        for sid in sids:
+            lat, lon = self.coords[sid]
+            bins.setdefault((math.floor(lat / cell_deg), math.floor(lon / cell_deg)), []).append(sid)
+        out = []
+        for ids in bins.values():
+            out.append({
+                "lat": sum(self.coords[s][0] for s in ids) / len(ids),
+                "lon": sum(self.coords[s][1] for s in ids) / len(ids),
+                "ids": ids,
+            })
+        return out
+
+def cluster_cell_for_zoom(zoom) -> float:
+    """Cluster bin size (deg): roughly a quarter of the visible longitude span."""
+    return 360.0 / (2 ** max(0, int(zoom or 0))) / 4.0
+
+def zoom_for_bbox(south: float, west: float, north: float, east: float) -> int:
+    span = max(north - south, (east - west) % 360 or 360.0, 1e-6)
+    return max(1, min(18, int(math.log2(360.0 / span))))
@@ -0,0 +1,76 @@
+"""
+Cold-start import profile, from `python -X importtime`.
+
+    python startup_profile.py              # every project module
+    python startup_profile.py --tab About  # full script run of one tab (AppTest)
+
+Each measurement runs in a fresh interpreter with streamlit already imported,
+so the numbers are what a module or tab adds on top of the runtime itself.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+HEAVY = ["pandas", "numpy", "requests", "altair", "folium", "streamlit_folium", "matplotlib", "PIL", "pyarrow"]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_TAB_SCRIPT = """
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.session_state["active_tab"] = {tab!r}
+at.run()
+"""
+
+def _importtime(code: str) -> tuple:
+    """
+    ({top-level module: cumulative µs}, {heavy library: cumulative µs}) for
+    everything imported after streamlit. Module body execution counts too.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import streamlit\n" + code],
+        cwd=ROOT, capture_output=True, text=True,
+    ).stderr
+    times, heavy, started = {}, {}, False
+    for line in out.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        cum, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if not started:
+            started = name == "streamlit" and indent == 1
+            continue
+        if indent == 1:
+            times[name] = times.get(name, 0) + cum
+        if name in HEAVY:
+            # each library is imported once, at whatever depth it was first needed
+            heavy.setdefault(name, cum)
+    return times, heavy
+
+def _report(label: str, measured: tuple):
+    times, heavy = measured
+    total = sum(times.values())
+    print(f"{label:<24} {total / 1000:8.1f} ms  heavy: " +
+          (", ".join(f"{h} {t / 1000:.0f}ms" for h, t in heavy.items()) or "-"))
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tab", action="append", help="profile a full script run of this tab (repeatable)")
+    args = ap.parse_args(argv)
+
+    if args.tab:
+        for tab in args.tab:
+            _report(f"tab {tab}", _importtime(_TAB_SCRIPT.format(app=str(ROOT / "app.py"), tab=tab)))
+        return 0
+
+    for path in sorted(ROOT.glob("*.py")):
+        if path.stem in ("app", Path(__file__).stem):
+            continue
+        _report(path.stem, _importtime(f"import {path.stem}"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Storage backends for the station .txt files.
+
+Every backend lists files as {"name","href","etag","mtime","size"} dicts
+and turns a listing entry into a path-like file with .read_text(),
+.iter_lines() and .read_range(start, end); .issues() describes problems
+with the last listing. `href` is the file's identity for the caches, `etag`
+changes whenever its content does.
+
+    webdav  the Sciebo share, read over HTTP (webdav_client.py)
+    local   a directory on this machine: local disk, NFS mount, synced folder
+    mirror  the WebDAV folder synced into a local directory; reads are local
+
+STORAGE_BACKEND in config.py picks one; get_backend() returns it.
+"""
+import hashlib
+import json
+import os
+import threading
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+from config import STORAGE_BACKEND, STORAGE_LOCAL_DIR, STORAGE_MIRROR_DIR
+
+def _hash_items(items) -> str:
+    s = "\n".join(f'{it["name"]}|{it["href"]}|{it["etag"]}|{it["mtime"]}|{it["size"]}' for it in items)
+    return hashlib.sha256(s.encode()).hexdigest()
+
+class LocalTxt(os.PathLike):
+    """Path-like station file on local disk (same interface as webdav_client.RemoteTxt)."""
+    def __init__(self, path, name: str | None = None, href: str | None = None,
+                 etag: str = "", mtime: str = "", size: int = 0):
+        self.path = Path(path)
+        self.name = name or self.path.name
+        self.href = href or str(self.path)
+        self.etag = etag
+        self.mtime = mtime
+        self.size = size
+
+    def read_text(self, encoding="utf-8", errors="ignore") -> str:
+        return self.path.read_text(encoding=encoding, errors=errors)
+
+    def iter_lines(self):
+        """Yield the lines without line endings; closing the generator closes the file."""
+        with open(self.path, encoding="utf-8", errors="ignore", newline="") as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+    def read_range(self, start: int, end: int | None = None) -> bytes:
+        """Bytes [start, end) of the file (end=None: to EOF)."""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read() if end is None else f.read(max(0, end - start))
+
+    def __fspath__(self):
+        return self.name
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def stem(self):
+        return Path(self.name).stem
+
+class WebDAVBackend:
+    """Reads straight from the WebDAV share (sync-collection deltas for listings)."""
+    def list(self) -> list:
+        from webdav_client import list_remote_txts
+        return list_remote_txts()
+
+    def file(self, item: dict):
+        from webdav_client import RemoteTxt
+        return RemoteTxt(name=item["name"], href=item["href"], etag=item["etag"],
+                         mtime=item["mtime"], size=item["size"])
+
+    def snapshot_hash(self, items) -> str:
+        from webdav_client import remote_snapshot_hash
+        return remote_snapshot_hash(items)
+
+    def issues(self) -> list:
+        return []
+
+class LocalBackend:
+    """Every *.txt under a local directory; ETag from mtime and size."""
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._listing, self._hash = [], None
+
+    def _scan(self) -> list:
+        items = []
+        for dirpath, dirnames, files in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for f in files:
+                if not f.lower().endswith(".txt"):
+                    continue
+                p = Path(dirpath) / f
+                st = p.stat()
+                items.append({
+                    "name": f, "href": str(p.resolve()),
+                    "etag": f"{st.st_mtime_ns:x}-{st.st_size:x}",
+                    "mtime": formatdate(st.st_mtime, usegmt=True), "size": st.st_size,
+                })
+        return sorted(items, key=lambda x: (x["name"].lower(), x["href"]))
+
+    def list(self) -> list:
+        """Like the WebDAV listing, an unchanged directory returns the same list object."""
+        items = self._scan()
+        with self._lock:
+            if items != self._listing:
+                self._listing, self._hash = items, None
+            return self._listing
+
+    def issues(self) -> list:
+        return []
+
+    def file(self, item: dict) -> LocalTxt:
+        return LocalTxt(item["href"], name=item["name"], href=item["href"], etag=item["etag"],
+                        mtime=item["mtime"], size=item["size"])
+
+    def snapshot_hash(self, items) -> str:
+        with self._lock:
+            if items is self._listing:
+                if self._hash is None:
+                    self._hash = _hash_items(items)
+                return self._hash
+        return _hash_items(items)
+
+class MirrorBackend:
+    """
+    Keeps a local copy of the WebDAV folder and serves reads from it.
+
+    Each listing downloads only the files whose ETag differs from the copy
+    on disk and deletes the ones gone from the share. Entries keep the remote
+    href/etag, so caches see the same files as with the webdav backend. If
+    the share cannot be reached or answers garbage, the last mirrored state
+    is served. Failed downloads are retried on every listing and reported
+    by issues() until they succeed.
+    """
+    MANIFEST = ".mirror.json"
+
+    def __init__(self, root, remote: WebDAVBackend | None = None):
+        self.root = Path(root)
+        self.remote = remote or WebDAVBackend()
+        self._lock = threading.Lock()
+        self._source = None             # remote listing the mirror was synced to
+        self._listing, self._hash = [], None
+        self._manifest = None           # href -> listing entry + "rel"
+        self._failed = {}               # href -> why its download failed
+        self._offline = None            # why the last remote listing failed
+
+    def _load_manifest(self) -> dict:
+        if self._manifest is None:
+            try:
+                self._manifest = json.loads((self.root / self.MANIFEST).read_text())
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (self.MANIFEST + ".part")
+        tmp.write_text(json.dumps(self._manifest, indent=1))
+        os.replace(tmp, self.root / self.MANIFEST)
+
+    def _rel(self, href: str) -> str:
+        """Path of a remote file relative to WEBDAV_FOLDER (never escaping the mirror)."""
+        from config import WEBDAV_BASE, WEBDAV_FOLDER
+        folder = unquote(urlsplit(urljoin(WEBDAV_BASE, WEBDAV_FOLDER)).path)
+        path = unquote(urlsplit(href).path)
+        rel = path[len(folder):] if path.startswith(folder) else path.rsplit("/", 1)[-1]
+        parts = [s for s in rel.split("/") if s not in ("", ".", "..")]
+        return "/".join(parts)
+
+    def _sync(self, items: list) -> None:
+        manifest = self._load_manifest()
+        for it in items:
+            old = manifest.get(it["href"])
+            rel = self._rel(it["href"])
+            dest = self.root / rel
+            if old and old["etag"] == it["etag"] and old["rel"] == rel and dest.exists():
+                continue
+            try:
+                self.remote.file(it).save_to(dest)
+            except Exception as e:
+                # keep the previous copy (if any) and retry on the next listing
+                kept = "serving the previous copy" if old and (self.root / old["rel"]).exists() else "not mirrored"
+                self._failed[it["href"]] = f"Mirror: could not download {it['name']} ({e}); {kept}"
+                continue
+            self._failed.pop(it["href"], None)
+            if old and old["rel"] != rel:
+                (self.root / old["rel"]).unlink(missing_ok=True)
+            manifest[it["href"]] = dict(it, rel=rel)
+        hrefs = {it["href"] for it in items}
+        for href in [h for h in manifest if h not in hrefs]:
+            (self.root / manifest.pop(href)["rel"]).unlink(missing_ok=True)
+        for href in [h for h in self._failed if h not in hrefs]:
+            del self._failed[href]
+        try:
+            self._save_manifest()
+        except OSError as e:
+            self._failed[""] = f"Mirror: could not save {self.MANIFEST} ({e})"
+        else:
+            self._failed.pop("", None)
+
+    def list(self) -> list:
+        import requests
+        import xml.etree.ElementTree as ET
+        try:
+            items = self.remote.list()
+        except (requests.RequestException, ET.ParseError) as e:
+            items = None  # offline: serve what is on disk
+            offline = f"WebDAV share not reachable ({e}); serving the local mirror"
+        else:
+            offline = None
+        with self._lock:
+            self._offline = offline
+            if items is not None and items is self._source and not self._failed:
+                return self._listing
+            if items is not None:
+                self._sync(items)
+                self._source = items
+            manifest = self._load_manifest()
+            listing = sorted(
+                ({k: v for k, v in e.items() if k != "rel"} for e in manifest.values()
+                 if (self.root / e["rel"]).exists()),
+                key=lambda x: (x["name"].lower(), x["href"]),
+            )
+            if listing != self._listing:
+                self._listing, self._hash = listing, None
+            return self._listing
+
+    def issues(self) -> list:
+        """Messages about the last listing: share unreachable, failed downloads."""
+        with self._lock:
+            return ([self._offline] if self._offline else []) + list(self._failed.values())
+
+    def file(self, item: dict) -> LocalTxt:
+        rel = self._load_manifest()[item["href"]]["rel"]
+        return LocalTxt(self.root / rel, name=item["name"], href=item["href"], etag=item["etag"],
+                        mtime=item["mtime"], size=item["size"])
+
+    def snapshot_hash(self, items) -> str:
+        with self._lock:
+            if items is self._listing:
+                if self._hash is None:
+                    self._hash = _hash_items(items)
+                return self._hash
+        return _hash_items(items)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """The backend named by STORAGE_BACKEND (one instance per process)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if STORAGE_BACKEND == "webdav":
+                _backend = WebDAVBackend()
+            elif STORAGE_BACKEND == "local":
+                _backend = LocalBackend(STORAGE_LOCAL_DIR)
+            elif STORAGE_BACKEND == "mirror":
+                _backend = MirrorBackend(STORAGE_MIRROR_DIR)
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r} (webdav, local or mirror)")
+        return _backend
@@ -0,0 +1,162 @@
+"""
+webdav_client's sync-collection listing against webdav_standin.py.
+
+    python -m pytest -q tests
+"""
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+@pytest.fixture
+def dav(tmp_path, monkeypatch):
+    """-> start(sync=True, refuse=501): (share dir, webdav_client, request counts) on a fresh stand-in."""
+    # config.py reads st.secrets, which needs a secrets.toml (here: cwd/.streamlit)
+    (tmp_path / ".streamlit").mkdir()
+    (tmp_path / ".streamlit" / "secrets.toml").write_text('WEBDAV_FOLDER = ""\n')
+    monkeypatch.chdir(tmp_path)
+    import webdav_client
+    import webdav_standin
+
+    root = tmp_path / "share"
+    (root / "sub").mkdir(parents=True)
+    (root / "a_1h.txt").write_text("a\n")
+    (root / "sub" / "b_1h.txt").write_text("b\n")
+    (root / "sub" / "README.md").write_text("keeps sub/ alive when b is deleted\n")
+    servers = []
+
+    def start(sync: bool = True, refuse: int = 501):
+        httpd = webdav_standin.serve(root, port=0, sync=sync, refuse=refuse)
+        servers.append(httpd)
+        host = f"http://127.0.0.1:{httpd.server_address[1]}"
+        monkeypatch.setattr(webdav_client, "WEBDAV_HOST", host)
+        monkeypatch.setattr(webdav_client, "WEBDAV_BASE", host + webdav_standin.PREFIX)
+        monkeypatch.setattr(webdav_client, "WEBDAV_FOLDER", "")
+        monkeypatch.setattr(webdav_client, "_sync",
+                            {"token": None, "supported": True, "files": {}, "listing": [], "hash": None})
+        return root, webdav_client, httpd.share.requests
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+def _names(items):
+    return [it["name"] for it in items]
+
+def test_unchanged_poll_is_one_report(dav):
+    _, wc, requests_seen = dav()
+    first = wc.list_remote_txts()
+    h = wc.remote_snapshot_hash(first)
+    assert _names(first) == ["a_1h.txt", "b_1h.txt"]
+
+    requests_seen.clear()
+    second = wc.list_remote_txts()
+    assert requests_seen == {"REPORT": 1}
+    assert second is first
+    assert wc.remote_snapshot_hash(second) == h
+
+def test_modified_and_deleted_files_arrive_as_deltas(dav):
+    root, wc, requests_seen = dav()
+    first = wc.list_remote_txts()
+    etag_a = first[0]["etag"]
+
+    (root / "a_1h.txt").write_text("a changed\n")
+    (root / "sub" / "b_1h.txt").unlink()
+    (root / "c_1h.txt").write_text("c\n")
+    requests_seen.clear()
+    second = wc.list_remote_txts()
+
+    assert requests_seen == {"REPORT": 1}
+    assert _names(second) == ["a_1h.txt", "c_1h.txt"]
+    assert second[0]["etag"] != etag_a
+    assert wc.remote_snapshot_hash(second) != wc.remote_snapshot_hash(first)
+
+def test_deleted_folder_drops_its_files(dav, monkeypatch):
+    root, wc, requests_seen = dav()
+    (root / "sub" / "deeper").mkdir()
+    (root / "sub" / "deeper" / "d_1h.txt").write_text("d\n")
+    assert _names(wc.list_remote_txts()) == ["a_1h.txt", "b_1h.txt", "d_1h.txt"]
+
+    seen = []
+    parse = wc._parse_multistatus
+    def spy(xml):
+        out = parse(xml)
+        seen.append(out[1])
+        return out
+    monkeypatch.setattr(wc, "_parse_multistatus", spy)
+
+    shutil.rmtree(root / "sub")
+    requests_seen.clear()
+    assert _names(wc.list_remote_txts()) == ["a_1h.txt"]
+    assert requests_seen == {"REPORT": 1}
+    assert [sorted(h.rsplit("/webdav/", 1)[1] for h in r) for r in seen] == [["sub/"]]
+
+def test_bogus_token_falls_back_to_one_propfind(dav):
+    _, wc, requests_seen = dav()
+    first = wc.list_remote_txts()
+    wc._sync["token"] = "http://standin.local/sync/bogus"
+
+    requests_seen.clear()
+    again = wc.list_remote_txts()
+    assert requests_seen == {"REPORT": 1, "PROPFIND": 1}
+    assert _names(again) == _names(first)
+
+    # the PROPFIND handed out a fresh token: back to one REPORT per poll
+    requests_seen.clear()
+    assert wc.list_remote_txts() is again
+    assert requests_seen == {"REPORT": 1}
+
+def test_server_without_sync_uses_propfind_only(dav):
+    _, wc, requests_seen = dav(sync=False)
+    first = wc.list_remote_txts()
+    assert requests_seen == {"REPORT": 1, "PROPFIND": 1}   # 501, remembered
+
+    requests_seen.clear()
+    for _ in range(2):
+        assert _names(wc.list_remote_txts()) == _names(first)
+    assert requests_seen == {"PROPFIND": 2}
+
+def test_supported_report_403_turns_sync_off(dav):
+    _, wc, requests_seen = dav(sync=False, refuse=403)
+    first = wc.list_remote_txts()
+    assert requests_seen == {"REPORT": 1, "PROPFIND": 1}
+    assert not wc._sync["supported"]
+
+    requests_seen.clear()
+    assert _names(wc.list_remote_txts()) == _names(first)
+    assert requests_seen == {"PROPFIND": 1}
+
+def test_sync_disabled_in_config_uses_propfind_only(dav):
+    _, wc, requests_seen = dav()
+    wc._sync["supported"] = False
+    wc.list_remote_txts()
+    wc.list_remote_txts()
+    assert requests_seen == {"PROPFIND": 2}
+
+def test_transient_report_error_keeps_sync(dav, monkeypatch):
+    _, wc, requests_seen = dav()
+    wc.list_remote_txts()
+    report = wc._sync_report
+
+    def forbidden(url, token):
+        # a 403 without a DAV precondition: permissions, not a missing REPORT
+        r = requests.Response()
+        r.status_code = 403
+        r._content = b'<?xml version="1.0"?><d:error xmlns:d="DAV:"><s:message xmlns:s="http://sabredav.org/ns">Forbidden</s:message></d:error>'
+        raise requests.HTTPError(response=r)
+
+    monkeypatch.setattr(wc, "_sync_report", forbidden)
+    requests_seen.clear()
+    wc.list_remote_txts()
+    assert requests_seen == {"PROPFIND": 1}
+    assert wc._sync["supported"]
+
+    monkeypatch.setattr(wc, "_sync_report", report)
+    requests_seen.clear()
+    wc.list_remote_txts()
+    assert requests_seen == {"REPORT": 1}
@@ -1,7 +1,8 @@
 
 import folium
 from folium import IFrame
-from config import MAP_INIT_CENTER, MAP_INIT_ZOOM
+from config import MAP_INIT_CENTER, MAP_INIT_ZOOM, MAP_MAX_MARKERS
+from spatial import bounds_from_folium, cluster_cell_for_zoom
 
 def popup_html_for(sid: str, s: dict) -> str:
     lat = s["lat"]; lon = s["lon"]
@@ -96,7 +97,8 @@ def popup_html_for(sid: str, s: dict) -> str:
 #         ).add_to(m)
 #     return m
 
-def build_map(stations_dict: dict) -> folium.Map:
+def build_map() -> folium.Map:
+    """Base map (tiles only); station markers are streamed in via build_marker_layer()."""
     # Create base map (OpenStreetMap by default)
     m = folium.Map(
         location=MAP_INIT_CENTER,
@@ -113,23 +115,48 @@ def build_map(stations_dict: dict) -> folium.Map:
         name="Satellite"
     ).add_to(m)
 
-    # Add all station markers
-    for sid, s in stations_dict.items():
-        if s["lat"] is None or s["lon"] is None:
-            continue
-
-        html = popup_html_for(sid, s)
-        iframe = IFrame(html=html, width=700, height=340)
-        pop = folium.Popup(iframe, max_width=720, min_width=360, parse_html=True)
+    return m
 
-        folium.Marker(
-            [s["lat"], s["lon"]],
-            popup=pop,
-            tooltip=sid,
-            icon=folium.Icon(color="blue", icon="")
-        ).add_to(m)
+def _station_marker(sid: str, s: dict) -> folium.Marker:
+    html = popup_html_for(sid, s)
+    iframe = IFrame(html=html, width=700, height=340)
+    pop = folium.Popup(iframe, max_width=720, min_width=360, parse_html=True)
+    return folium.Marker(
+        [s["lat"], s["lon"]],
+        popup=pop,
+        tooltip=sid,
+        icon=folium.Icon(color="blue", icon="")
+    )
 
-    # Add layer control (toggle button)
-    folium.LayerControl().add_to(m)
+def _cluster_marker(c: dict) -> folium.CircleMarker:
+    n = len(c["ids"])
+    return folium.CircleMarker(
+        [c["lat"], c["lon"]],
+        radius=min(28, 8 + 3 * n ** 0.5),
+        color="#1d3b72", weight=2,
+        fill=True, fill_color="#1d3b72", fill_opacity=0.55,
+        tooltip=f"{n} stations (zoom in)",
+    )
 
-    return m
+def build_marker_layer(stations_dict: dict, index, bounds=None, zoom=MAP_INIT_ZOOM) -> folium.FeatureGroup:
+    """
+    Markers for the stations inside the current viewport only.
+    `bounds` is the st_folium 'bounds' dict (None = whole world). When more than
+    MAP_MAX_MARKERS stations are in view, they are sent as cluster aggregates.
+    """
+    fg = folium.FeatureGroup(name="Stations")
+    box = bounds_from_folium(bounds) if bounds else None
+    sids = index.bbox(*box) if box else list(index.coords)
+
+    if len(sids) <= MAP_MAX_MARKERS:
+        for sid in sids:
+            _station_marker(sid, stations_dict[sid]).add_to(fg)
+        return fg
+
+    for c in index.clusters(sids, cluster_cell_for_zoom(zoom)):
+        if len(c["ids"]) == 1:
+            sid = c["ids"][0]
+            _station_marker(sid, stations_dict[sid]).add_to(fg)
+        else:
+            _cluster_marker(c).add_to(fg)
+    return fg
@@ -1,11 +1,12 @@
 
-from PIL import Image
 from io import BytesIO
 import base64
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+
+# PIL and matplotlib are imported on first use to keep module import cheap.
 
 def image_to_base64(path, width: int | None = None) -> str:
+    from PIL import Image
+
     img = Image.open(path)
     if width and img.width:
         r = width / img.width
@@ -23,6 +24,11 @@ def safe_b64(st, path, width: int | None = None) -> str:
 
 def fig_png_b64(df):
     """Render compact matplotlib line chart (DateTime vs Value) to base64 PNG."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
     fig, ax = plt.subplots(figsize=(6.0, 2.6), dpi=110)
     ax.plot(df["DateTime"], df["Value"])
     ax.set_xlabel("Date")
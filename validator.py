@@ -0,0 +1,256 @@
+"""
+Streaming validator for contributed GNSS4SurfaceWater .txt files.
+
+Checks the documented format line by line in constant memory:
+metadata header order and required keys, coordinate ranges, the
+DateTime,Height column header, `YYYY-MM-DDThh:mm:ss` timestamps (no
+time-zone offset), strictly increasing time and numeric heights.
+
+CLI:  python validator.py FILE [FILE ...] [--max-errors N] [--header-only]
+"""
+import math
+import operator
+import re
+import sys
+from datetime import datetime
+from itertools import islice
+
+# Header keys in the required order (normalised like parsing._clean_key)
+HEADER_KEYS = [
+    "station", "location", "latitude", "longitude", "sensor_type", "water_body",
+    "vertical_datum", "units", "provider", "access_raw_data", "gnss_receiver", "gnss_antenna",
+]
+COLUMNS = ["datetime", "height"]
+
+# `<siteID>_<temporalResolution>.txt`
+RESOLUTION_RE = re.compile(r"_(\d+)\s*(s|sec|m|min|h|hr|d|day)s?$", re.IGNORECASE)
+FILENAME_RE = re.compile(r"^[A-Za-z0-9]+_\d+(?:s|sec|m|min|h|hr|d|day)s?\.txt$", re.IGNORECASE)
+
+_META_RE = re.compile(r"^#\s*([^:]+)\s*:\s*(.*)$")
+_TS_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}")
+_OFFSET_RE = re.compile(r"(?:Z|[+-]\d{2}(?::?\d{2})?)$")
+_TS_SEPS = ((4, "-"), (7, "-"), (10, "T"), (13, ":"), (16, ":"))   # fixed positions in YYYY-MM-DDThh:mm:ss
+_RANGES = {"latitude": (-90.0, 90.0), "longitude": (-180.0, 180.0)}
+_BLOCK_BYTES = 1 << 22   # rows are validated in blocks of ~4 MB ...
+_BLOCK_LINES = 1 << 17   # ... or this many lines for plain iterables
+
+class Report:
+    """Validation result. Keeps at most `max_errors` messages, but counts all."""
+    def __init__(self, name: str = "", max_errors: int = 100):
+        self.name = name
+        self.max_errors = max_errors
+        self.errors = []      # [(line_no, message)]
+        self.n_errors = 0
+        self.header_error = None   # first (line_no, message) from the metadata/column header
+        self.n_rows = 0
+        self.meta = {}
+
+    @property
+    def header_ok(self) -> bool:
+        return self.header_error is None
+
+    @property
+    def ok(self) -> bool:
+        return self.n_errors == 0
+
+    def add(self, line_no: int, msg: str, header: bool = False):
+        self.n_errors += 1
+        if header and self.header_error is None:
+            self.header_error = (line_no, msg)
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_no, msg))
+
+    def summary(self) -> str:
+        if self.ok:
+            return f"{self.name}: OK ({self.n_rows} rows)"
+        more = self.n_errors - len(self.errors)
+        lines = [f"{self.name}: {self.n_errors} error(s)"]
+        lines += [f"  line {n}: {m}" if n else f"  {m}" for n, m in self.errors]
+        if more:
+            lines.append(f"  ... {more} more")
+        return "\n".join(lines)
+
+def _check_header(lines, report: Report):
+    """Consume the metadata block and the column header from numbered lines."""
+    seen = set()
+    last = -1
+    line_no = 0
+    for line_no, line in lines:
+        if line.strip() == "#":
+            break
+        m = _META_RE.match(line)
+        if not m:
+            report.add(line_no, "expected '# Key: value' metadata line or a bare '#' ending the header", header=True)
+            return
+        label, value = m.group(1).strip(), m.group(2).strip()
+        key = label.lower().replace(" ", "_")
+        report.meta[key] = value
+        if key not in HEADER_KEYS:
+            report.add(line_no, f"unknown header key '{label}'", header=True)
+            continue
+        pos = HEADER_KEYS.index(key)
+        if key in seen:
+            report.add(line_no, f"duplicate header key '{label}'", header=True)
+        elif pos < last:
+            report.add(line_no, f"header key '{label}' out of order (must come before '{HEADER_KEYS[last]}')", header=True)
+        seen.add(key)
+        last = max(last, pos)
+        if not value:
+            report.add(line_no, f"empty value for '{label}'", header=True)
+        elif key in _RANGES:
+            lo, hi = _RANGES[key]
+            try:
+                v = float(value)
+            except ValueError:
+                report.add(line_no, f"{key} '{value}' is not a decimal number", header=True)
+            else:
+                if not lo <= v <= hi:
+                    report.add(line_no, f"{key} {v} outside [{lo:g}, {hi:g}]", header=True)
+    else:
+        report.add(line_no, "file ends before the header is closed with '#'", header=True)
+        return
+
+    for key in HEADER_KEYS:
+        if key not in seen:
+            report.add(line_no, f"missing header key '{key}'", header=True)
+
+    for line_no, line in lines:
+        if [c.strip().lower() for c in line.split(",")] != COLUMNS:
+            report.add(line_no, f"expected column header 'DateTime,Height', got '{line.strip()}'", header=True)
+        return
+    report.add(line_no, "missing 'DateTime,Height' column header", header=True)
+
+def _timestamp(text: str) -> datetime:
+    """Naive datetime for a `YYYY-MM-DDThh:mm:ss` string; ValueError (with the reason) otherwise."""
+    if not _TS_RE.fullmatch(text):
+        if _TS_RE.match(text) and _OFFSET_RE.search(text):
+            raise ValueError(f"timestamp '{text}' has a time-zone offset (expected YYYY-MM-DDThh:mm:ss)")
+        raise ValueError(f"invalid timestamp '{text}' (expected YYYY-MM-DDThh:mm:ss)")
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError as e:
+        raise ValueError(f"invalid timestamp '{text}' ({e})") from None
+
+def _exact_rows(rows, line_no: int, prev, report: Report):
+    """Per-line checks with precise messages; returns the last valid timestamp."""
+    for line in rows:
+        line_no += 1
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("#"):
+            continue
+        report.n_rows += 1
+        t, sep, h = line.partition(",")
+        if not sep or "," in h:
+            report.add(line_no, "expected 2 comma-separated fields")
+            continue
+        try:
+            ts = _timestamp(t.strip())
+        except ValueError as e:
+            report.add(line_no, str(e))
+            ts = None
+        try:
+            if not math.isfinite(float(h)):
+                raise ValueError
+        except ValueError:
+            report.add(line_no, f"height '{h.strip()}' is not a finite number")
+        if ts is not None:
+            if prev is not None and ts <= prev:
+                report.add(line_no, f"timestamp {t.strip()} is not after the previous one")
+            prev = ts
+    return prev
+
+def _fast_block(block: str, prev):
+    """
+    Whole-block checks at C speed (str.split + map); returns the last
+    timestamp, or None if anything is off and the block needs the exact
+    per-line pass. Every row must be `YYYY-MM-DDThh:mm:ss,<height>`, so
+    comment and blank lines (and any offset) also fall through to it.
+    """
+    if block.count(",") != block.count("\n"):
+        return None
+    parts = block.replace("\n", ",").split(",")
+    ts_text = parts[0:-1:2]
+    # strict layout: 19 characters with the separators in place; fromisoformat
+    # then only accepts digits elsewhere, so no offsets or other ISO variants
+    if set(map(len, ts_text)) != {19}:
+        return None
+    joined = "".join(ts_text)
+    if any(joined[i::19].count(c) != len(ts_text) for i, c in _TS_SEPS):
+        return None
+    try:
+        ts = list(map(datetime.fromisoformat, ts_text))
+        hv = list(map(float, parts[1::2]))
+    except ValueError:
+        return None
+    if not all(map(math.isfinite, hv)):
+        return None
+    if (prev is not None and ts[0] <= prev) or any(map(operator.ge, ts, ts[1:])):
+        return None
+    return ts[-1]
+
+def validate_lines(lines, name: str = "", max_errors: int = 100, header_only: bool = False) -> Report:
+    """
+    Validate an iterable of text lines (file object, generator, ...).
+    Rows are checked in fixed-size chunks, so memory stays constant.
+    """
+    report = Report(name, max_errors)
+    if name and not name.startswith("<") and not FILENAME_RE.match(name.rsplit("/", 1)[-1]):
+        report.add(0, "file name should follow '<siteID>_<temporalResolution>.txt'")
+
+    it = iter(lines)
+    counter = [0]
+    def numbered():
+        for line in it:
+            counter[0] += 1
+            yield counter[0], line.rstrip("\r\n")
+    _check_header(numbered(), report)
+    if header_only:
+        return report
+
+    line_no, prev = counter[0], None
+    read = getattr(it, "readlines", None)
+    while True:
+        rows = read(_BLOCK_BYTES) if read else list(islice(it, _BLOCK_LINES))
+        if not rows:
+            break
+        # file objects keep line endings; other iterables may not
+        block = ("" if rows[0].endswith("\n") else "\n").join(rows)
+        if not block.endswith("\n"):
+            block += "\n"
+        last = _fast_block(block, prev)
+        if last is None:
+            prev = _exact_rows(rows, line_no, prev, report)
+        else:
+            report.n_rows += len(rows)
+            prev = last
+        line_no += len(rows)
+    return report
+
+def validate_file(path, max_errors: int = 100, header_only: bool = False) -> Report:
+    with open(path, encoding="utf-8", errors="replace", buffering=1 << 20) as fh:
+        return validate_lines(fh, name=str(path), max_errors=max_errors, header_only=header_only)
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Validate GNSS4SurfaceWater station files.")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--max-errors", type=int, default=100)
+    ap.add_argument("--header-only", action="store_true", help="stop after the column header")
+    args = ap.parse_args(argv)
+
+    status = 0
+    for f in args.files:
+        if f == "-":
+            report = validate_lines(sys.stdin, name="<stdin>", max_errors=args.max_errors, header_only=args.header_only)
+        else:
+            try:
+                report = validate_file(f, max_errors=args.max_errors, header_only=args.header_only)
+            except OSError as e:
+                report = Report(f)
+                report.add(0, f"cannot read file: {e.strerror or e}")
+        print(report.summary())
+        status |= not report.ok
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
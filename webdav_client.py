@@ -1,66 +1,178 @@
 
 import requests
+import threading
 import xml.etree.ElementTree as ET
 from urllib.parse import urljoin
+from xml.sax.saxutils import escape
 from pathlib import Path
 import os
 
-from config import WEBDAV_BASE, WEBDAV_HOST, WEBDAV_FOLDER, WEBDAV_TOKEN, WEBDAV_PASS
+from config import WEBDAV_BASE, WEBDAV_HOST, WEBDAV_FOLDER, WEBDAV_TOKEN, WEBDAV_PASS, WEBDAV_SYNC, WEBDAV_TIMEOUT
 
 _session = requests.Session()
 _session.auth = (WEBDAV_TOKEN, WEBDAV_PASS)
 
+_NS = {"d": "DAV:"}
+
+_PROPS = """
+  <d:prop>
+    <d:displayname/><d:getetag/><d:getlastmodified/><d:getcontentlength/><d:resourcetype/>
+  </d:prop>"""
+
+_PROPFIND_BODY = f"""<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="DAV:">{_PROPS.replace("<d:resourcetype/>", "<d:resourcetype/><d:sync-token/>")}
+</d:propfind>"""
+
+_SYNC_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<d:sync-collection xmlns:d="DAV:">
+  <d:sync-token>{token}</d:sync-token>
+  <d:sync-level>infinite</d:sync-level>{props}
+</d:sync-collection>"""
+
+# REPORT answers meaning "sync-collection not available on this server"
+_UNSUPPORTED = {405, 415, 501}
+
+class SyncTokenInvalid(Exception):
+    """Server rejected the sync token (RFC 6578 DAV:valid-sync-token)."""
+
+class SyncUnsupported(Exception):
+    """Server refused the REPORT type (RFC 3253 DAV:supported-report; SabreDAV answers 403)."""
+
+# Sync-collection state for the listing under WEBDAV_FOLDER: the last token,
+# the files it describes (by href) and the sorted listing/hash handed out.
+_sync = {"token": None, "supported": WEBDAV_SYNC, "files": {}, "listing": [], "hash": None}
+_sync_lock = threading.Lock()
+
 def _propfind(url: str, depth: str = "1") -> str:
-    r = _session.request("PROPFIND", url, headers={"Depth": depth})
+    r = _session.request("PROPFIND", url, headers={"Depth": depth, "Content-Type": "application/xml"},
+                         data=_PROPFIND_BODY, timeout=WEBDAV_TIMEOUT)
     r.raise_for_status()
     return r.text
 
-def list_remote_txts():
+def _sync_report(url: str, token: str) -> str:
+    body = _SYNC_BODY.format(token=escape(token or ""), props=_PROPS)
+    r = _session.request("REPORT", url, headers={"Depth": "0", "Content-Type": "application/xml"}, data=body,
+                         timeout=WEBDAV_TIMEOUT)
+    if r.status_code in (403, 409, 412) and "valid-sync-token" in r.text:
+        raise SyncTokenInvalid(token)
+    if r.status_code in _UNSUPPORTED or (r.status_code in (403, 409) and "supported-report" in r.text):
+        raise SyncUnsupported(r.status_code)
+    r.raise_for_status()
+    return r.text
+
+def _ok_props(resp):
+    """The DAV:prop of the 200 propstat of a response (None if deleted/missing)."""
+    for propstat in resp.findall("d:propstat", _NS):
+        status = propstat.findtext("d:status", default="HTTP/1.1 200 OK", namespaces=_NS)
+        if " 200" in status:
+            return propstat.find("d:prop", _NS)
+    return None
+
+def _parse_item(href: str, props):
+    """Listing entry for a .txt file response, else None."""
+    if props is None or not href.lower().endswith(".txt"):
+        return None
+    name = props.findtext("d:displayname", default="", namespaces=_NS) or href.split("/")[-1]
+    if not name.lower().endswith(".txt"):
+        return None
+
+    etag = (props.findtext("d:getetag", default="", namespaces=_NS) or "").strip('"')
+    mtime = props.findtext("d:getlastmodified", default="", namespaces=_NS) or ""
+    size_text = props.findtext("d:getcontentlength", default="0", namespaces=_NS) or "0"
+    try:
+        size = int(size_text)
+    except Exception:
+        size = 0
+
+    file_url = urljoin(WEBDAV_HOST, href)
+    return {"name": name, "href": file_url, "etag": etag, "mtime": mtime, "size": size}
+
+def _parse_multistatus(xml: str):
     """
-    Recursive listing under WEBDAV_FOLDER.
-    Returns: [{"name","href","etag","mtime","size"}]
+    -> (changed {href: item}, removed {href}, sync token or None).
+    Deleted members come back as a response with a bare 404 status; a
+    deleted folder may come back as one 404 for its href (ending in /).
     """
-    url = urljoin(WEBDAV_BASE, WEBDAV_FOLDER)
-    xml = _propfind(url, depth="infinity")
-    ns = {"d": "DAV:"}
     root = ET.fromstring(xml)
-    items = []
-    for resp in root.findall("d:response", ns):
-        href_el = resp.find("d:href", ns)
-        if href_el is None:
+    changed, removed = {}, set()
+    token = root.findtext("d:sync-token", default=None, namespaces=_NS)
+    for resp in root.findall("d:response", _NS):
+        href = (resp.findtext("d:href", default="", namespaces=_NS) or "").strip()
+        if not href:
             continue
-        href = (href_el.text or "").strip()
-        if not href.lower().endswith(".txt"):
+        status = resp.findtext("d:status", default="", namespaces=_NS)
+        if " 404" in status:
+            removed.add(urljoin(WEBDAV_HOST, href))
             continue
+        props = _ok_props(resp)
+        if props is not None and token is None:
+            token = props.findtext("d:sync-token", default=None, namespaces=_NS)
+        item = _parse_item(href, props)
+        if item is not None:
+            changed[item["href"]] = item
+    return changed, removed, token
 
-        propstat = resp.find("d:propstat", ns)
-        if propstat is None:
-            continue
-        props = propstat.find("d:prop", ns)
-        if props is None:
-            continue
+def _publish(files: dict) -> list:
+    listing = sorted(files.values(), key=lambda x: (x["name"].lower(), x["href"]))
+    _sync.update(files=files, listing=listing, hash=None)
+    return listing
 
-        name = props.findtext("d:displayname", default=href.split("/")[-1], namespaces=ns)
-        if not name or not name.lower().endswith(".txt"):
-            continue
+def list_remote_txts():
+    """
+    Recursive listing under WEBDAV_FOLDER.
+    Returns: [{"name","href","etag","mtime","size"}]
 
-        etag = (props.findtext("d:getetag", default="", namespaces=ns) or "").strip('"')
-        mtime = props.findtext("d:getlastmodified", default="", namespaces=ns) or ""
-        size_text = props.findtext("d:getcontentlength", default="0", namespaces=ns) or "0"
-        try:
-            size = int(size_text)
-        except Exception:
-            size = 0
+    With a sync token from an earlier call, only the changes since then are
+    requested (RFC 6578 sync-collection REPORT); an unchanged folder returns
+    the very same list object. A rejected token or a failed REPORT falls back
+    to a full PROPFIND; a server without REPORT support (405/415/501, or
+    403/409 with DAV:supported-report) gets PROPFIND only.
+    """
+    url = urljoin(WEBDAV_BASE, WEBDAV_FOLDER)
+    with _sync_lock:
+        if _sync["supported"]:
+            try:
+                changed, removed, token = _parse_multistatus(_sync_report(url, _sync["token"]))
+            except SyncTokenInvalid:
+                _sync["token"] = None
+            except SyncUnsupported:
+                # no sync-collection here: plain PROPFIND from now on
+                _sync["supported"] = False
+                _sync["token"] = None
+            except (requests.HTTPError, ET.ParseError):
+                # anything else (auth, permissions, a garbled answer) may be
+                # transient: list with PROPFIND now and try REPORT again next time
+                _sync["token"] = None
+            else:
+                initial = _sync["token"] is None
+                _sync["token"] = token
+                if not initial and not changed and not removed:
+                    return _sync["listing"]
+                files = {} if initial else dict(_sync["files"])
+                for href in removed:
+                    if href.endswith("/"):
+                        # a removed folder: everything cached under it is gone
+                        for h in [h for h in files if h.startswith(href)]:
+                            del files[h]
+                    else:
+                        files.pop(href, None)
+                files.update(changed)
+                return _publish(files)
 
-        file_url = urljoin(WEBDAV_HOST, href)
-        items.append({"name": name, "href": file_url, "etag": etag, "mtime": mtime, "size": size})
-    return sorted(items, key=lambda x: (x["name"].lower(), x["href"]))
+        changed, _, token = _parse_multistatus(_propfind(url, depth="infinity"))
+        _sync["token"] = token if _sync["supported"] else None
+        return _publish(changed)
 
 def remote_snapshot_hash(items) -> str:
     """Hash of folder state to drive cache invalidation."""
     import hashlib
+    if items is _sync["listing"] and _sync["hash"] is not None:
+        return _sync["hash"]
     s = "\n".join(f'{it["name"]}|{it["href"]}|{it["etag"]}|{it["mtime"]}|{it["size"]}' for it in items)
-    return hashlib.sha256(s.encode()).hexdigest()
+    h = hashlib.sha256(s.encode()).hexdigest()
+    if items is _sync["listing"]:
+        _sync["hash"] = h
+    return h
 
 class RemoteTxt(os.PathLike):
     """Path-like wrapper for a remote text file so code can call .read_text(), .stem."""
@@ -72,11 +184,43 @@ class RemoteTxt(os.PathLike):
         self.size = size
 
     def read_text(self, encoding="utf-8", errors="ignore") -> str:
-        r = _session.get(self.href)
+        r = _session.get(self.href, timeout=WEBDAV_TIMEOUT)
         r.raise_for_status()
         r.encoding = r.encoding or "utf-8"
         return r.text
 
+    def iter_lines(self):
+        """Stream the file line by line; closing the generator drops the connection."""
+        r = _session.get(self.href, stream=True, timeout=WEBDAV_TIMEOUT)
+        try:
+            r.raise_for_status()
+            r.encoding = r.encoding or "utf-8"
+            yield from r.iter_lines(decode_unicode=True)
+        finally:
+            r.close()
+
+    def read_range(self, start: int, end: int | None = None) -> bytes:
+        """Bytes [start, end) via an HTTP Range request (end=None: to EOF)."""
+        rng = f"bytes={start}-{'' if end is None else end - 1}"
+        r = _session.get(self.href, headers={"Range": rng}, timeout=WEBDAV_TIMEOUT)
+        if r.status_code == 416:
+            return b""
+        r.raise_for_status()
+        # 200: the server ignored Range and sent the whole file
+        return r.content if r.status_code == 206 else r.content[start:end]
+
+    def save_to(self, dest) -> None:
+        """Stream the file to dest (written to a .part file, then renamed)."""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".part")
+        with _session.get(self.href, stream=True, timeout=WEBDAV_TIMEOUT) as r:
+            r.raise_for_status()
+            with open(tmp, "wb") as f:
+                for chunk in r.iter_content(1 << 16):
+                    f.write(chunk)
+        os.replace(tmp, dest)
+
     def __fspath__(self):
         return self.name
 
@@ -0,0 +1,239 @@
+"""
+Local stand-in for the Sciebo/Nextcloud WebDAV share, for development.
+
+Serves a directory with GET, PROPFIND (Depth 0/1/infinity) and the RFC 6578
+sync-collection REPORT. Changes on disk are picked up on every request and
+numbered, so sync tokens behave like the real server's: a token names a
+past state, the REPORT returns what changed since then, and tokens older
+than the kept history are rejected with DAV:valid-sync-token. A removed
+folder is reported as a single 404 for the folder, not per member (RFC 6578
+allows either). With sync
+off, REPORT is refused with 501, or with 403 + DAV:supported-report the way
+SabreDAV-based servers (Sciebo/Nextcloud) refuse it.
+
+    python webdav_standin.py ./solutions --port 8765 [--no-sync [501|403]]
+
+then point the app at it in .streamlit/secrets.toml:
+
+    WEBDAV_BASE = "http://127.0.0.1:8765/public.php/webdav/"
+    WEBDAV_HOST = "http://127.0.0.1:8765"
+    WEBDAV_FOLDER = ""
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+PREFIX = "/public.php/webdav/"
+TOKEN_BASE = "http://standin.local/sync/"
+HISTORY = 100
+
+class Share:
+    """Directory snapshots numbered by change, for sync tokens."""
+    def __init__(self, root: Path, sync: bool = True, refuse: int = 501):
+        self.root = root.resolve()
+        self.sync = sync
+        self.refuse = refuse                  # REPORT status when sync is off
+        self.lock = threading.Lock()
+        self.versions = [(0, self._scan())]   # [(n, {rel: (etag, mtime, size)})]
+        self.requests = {}                    # method -> count
+
+    def _scan(self) -> dict:
+        snap = {}
+        for dirpath, _, files in os.walk(self.root):
+            for f in files:
+                p = Path(dirpath) / f
+                st = p.stat()
+                snap[p.relative_to(self.root).as_posix()] = (f"{st.st_mtime_ns:x}-{st.st_size:x}", st.st_mtime, st.st_size)
+        return snap
+
+    def current(self) -> tuple:
+        """(n, snapshot), recording a new version if the directory changed."""
+        with self.lock:
+            snap = self._scan()
+            n, last = self.versions[-1]
+            if snap != last:
+                n += 1
+                self.versions.append((n, snap))
+                del self.versions[:-HISTORY]
+            return n, snap
+
+    def at(self, n: int):
+        with self.lock:
+            for v, snap in self.versions:
+                if v == n:
+                    return snap
+        return None
+
+def _dirs(snap) -> set:
+    """Every folder (with trailing /) that holds a file of the snapshot."""
+    return {p[:i + 1] for p in snap for i, c in enumerate(p) if c == "/"}
+
+def _token(n: int) -> str:
+    return f"{TOKEN_BASE}{n}"
+
+def _file_response(rel: str, info: tuple) -> str:
+    etag, mtime, size = info
+    return f"""<d:response><d:href>{escape(PREFIX + quote(rel))}</d:href><d:propstat><d:prop>
+<d:displayname>{escape(rel.rsplit("/", 1)[-1])}</d:displayname><d:getetag>"{etag}"</d:getetag>
+<d:getlastmodified>{formatdate(mtime, usegmt=True)}</d:getlastmodified>
+<d:getcontentlength>{size}</d:getcontentlength><d:resourcetype/>
+</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"""
+
+def _dir_response(rel: str, token: str | None = None) -> str:
+    sync = f"<d:sync-token>{token}</d:sync-token>" if token else ""
+    return f"""<d:response><d:href>{escape(PREFIX + quote(rel))}</d:href><d:propstat><d:prop>
+<d:resourcetype><d:collection/></d:resourcetype>{sync}
+</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"""
+
+def _error(condition: str) -> bytes:
+    return f'<?xml version="1.0" encoding="utf-8"?>\n<d:error xmlns:d="DAV:"><d:{condition}/></d:error>'.encode()
+
+def _multistatus(body: str, token: str | None = None) -> bytes:
+    sync = f"<d:sync-token>{token}</d:sync-token>" if token else ""
+    return f'<?xml version="1.0" encoding="utf-8"?>\n<d:multistatus xmlns:d="DAV:">{body}{sync}</d:multistatus>'.encode()
+
+class Handler(BaseHTTPRequestHandler):
+    share: Share = None
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _rel(self):
+        path = unquote(urlsplit(self.path).path)
+        if not path.startswith(PREFIX.rstrip("/")):
+            return None
+        return path[len(PREFIX):].strip("/")
+
+    def _send(self, code: int, body: bytes = b"", ctype: str = "application/xml; charset=utf-8", headers=None):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _count(self):
+        self.share.requests[self.command] = self.share.requests.get(self.command, 0) + 1
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        self._count()
+        rel = self._rel()
+        p = (self.share.root / rel) if rel is not None else None
+        if p is None or not p.is_file():
+            return self._send(404)
+        data = p.read_bytes()
+        m = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        if m:
+            start = int(m.group(1))
+            end = min(int(m.group(2)) if m.group(2) else len(data) - 1, len(data) - 1)
+            if start >= len(data):
+                return self._send(416, headers={"Content-Range": f"bytes */{len(data)}"})
+            return self._send(206, data[start:end + 1], "text/plain; charset=utf-8",
+                              {"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+        self._send(200, data, "text/plain; charset=utf-8")
+
+    do_HEAD = do_GET
+
+    def do_PROPFIND(self):
+        self._count()
+        rel = self._rel()
+        if rel is None or not (self.share.root / rel).exists():
+            return self._send(404)
+        n, snap = self.share.current()
+        depth = self.headers.get("Depth", "infinity")
+        token = _token(n) if self.share.sync else None
+        if (self.share.root / rel).is_file():
+            return self._send(207, _multistatus(_file_response(rel, snap[rel])))
+
+        base = f"{rel}/" if rel else ""
+        parts = [_dir_response(base, token)]
+        if depth != "0":
+            dirs = set()
+            for path, info in sorted(snap.items()):
+                if not path.startswith(base):
+                    continue
+                segs = path[len(base):].split("/")
+                if depth == "1" and len(segs) > 1:
+                    dirs.add(segs[0])
+                    continue
+                dirs.update("/".join(segs[:i]) for i in range(1, len(segs)))
+                parts.append(_file_response(path, info))
+            parts += [_dir_response(f"{base}{d}/") for d in sorted(dirs)]
+        self._send(207, _multistatus("".join(parts)))
+
+    def do_REPORT(self):
+        body = self._count()
+        if not self.share.sync:
+            if self.share.refuse == 403:
+                return self._send(403, _error("supported-report"))
+            return self._send(self.share.refuse)
+        try:
+            root = ET.fromstring(body)
+        except ET.ParseError:
+            return self._send(400)
+        if root.tag != "{DAV:}sync-collection":
+            return self._send(403, _error("supported-report"))
+        rel = self._rel() or ""
+        base = f"{rel}/" if rel else ""
+        token = (root.findtext("{DAV:}sync-token") or "").strip()
+        n, snap = self.share.current()
+        if token:
+            old = None
+            if token.startswith(TOKEN_BASE) and token[len(TOKEN_BASE):].isdigit():
+                old = self.share.at(int(token[len(TOKEN_BASE):]))
+            if old is None:
+                return self._send(403, _error("valid-sync-token"))
+        else:
+            old = {}
+
+        parts = []
+        for path, info in sorted(snap.items()):
+            if path.startswith(base) and old.get(path) != info:
+                parts.append(_file_response(path, info))
+        gone = {d for d in _dirs(old) - _dirs(snap) if d.startswith(base) and d != base}
+        gone = {d for d in gone if not any(d != g and d.startswith(g) for g in gone)}
+        removed = [p for p in set(old) - set(snap)
+                   if p.startswith(base) and not any(p.startswith(g) for g in gone)]
+        for path in sorted(gone) + sorted(removed):
+            parts.append(f"<d:response><d:href>{escape(PREFIX + quote(path))}</d:href>"
+                         f"<d:status>HTTP/1.1 404 Not Found</d:status></d:response>")
+        self._send(207, _multistatus("".join(parts), _token(n)))
+
+def serve(root, port: int = 8765, sync: bool = True, refuse: int = 501) -> ThreadingHTTPServer:
+    """Start the server in a background thread; returns it (use .shutdown())."""
+    share = Share(Path(root), sync=sync, refuse=refuse)
+    handler = type("ShareHandler", (Handler,), {"share": share})
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    httpd.share = share
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("root", help="directory to serve")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--no-sync", type=int, nargs="?", const=501, choices=(501, 403), metavar="STATUS",
+                    help="refuse REPORT like a server without RFC 6578: 501 (default) or 403 + DAV:supported-report")
+    args = ap.parse_args(argv)
+    httpd = serve(args.root, args.port, sync=args.no_sync is None, refuse=args.no_sync or 501)
+    print(f"Serving {args.root} at http://127.0.0.1:{args.port}{PREFIX}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        httpd.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())